@@ -1,5 +1,6 @@
 from datetime import datetime
 import random
+import os
 
 class Config:
     """
@@ -14,6 +15,26 @@ class Config:
     * who       when        version     change (include bug = if apply)
     * -----     -------     -------     -------------------------------
     * Ray       03/29/2023  1.0         Initial Creation
+    * Ray       10/18/2026  1.1         Bulk insert tuning attributes
+    * Ray       10/18/2026  1.2         Validation chunk size
+    * Ray       10/18/2026  1.3         Ingestion worker processes
+    * Ray       10/18/2026  1.4         Model registry check interval
+    * Ray       10/18/2026  1.5         Elbow search settings
+    * Ray       10/18/2026  1.6         Training CPU budget
+    * Ray       10/18/2026  1.7         Hyperparameter search strategy
+    * Ray       10/18/2026  1.8         Prediction micro-batching
+    * Ray       10/18/2026  1.9         Server worker processes
+    * Ray       10/18/2026  1.10        Background training jobs
+    * Ray       10/18/2026  1.11        Streaming batch prediction chunk size
+    * Ray       10/18/2026  1.12        Sparse categorical encoding switch
+    * Ray       10/18/2026  1.13        Imputation settings
+    * Ray       10/18/2026  1.14        Log levels and rotation
+    * Ray       10/18/2026  1.15        Latency histogram buckets
+    * Ray       10/18/2026  1.16        Model memory mapping
+    * Ray       10/18/2026  1.17        Compiled tree engine settings
+    * Ray       10/18/2026  1.18        Nearest-centroid cluster routing
+    * Ray       10/18/2026  1.19        Micro-batch scoring timeout
+    * Ray       10/18/2026  1.20        Seconds a claimed training job may wait for its process
     *
     *
     * Description: Class for configuration instance attributes
@@ -23,6 +44,67 @@ class Config:
         self.training_database = 'training'
         self.prediction_data_path = 'data/prediction_data'
         self.prediction_database = 'prediction'
+        # Bulk insert tuning: rows per executemany/commit and SQLite journal settings
+        self.insert_chunk_size = 10000
+        self.journal_mode = 'WAL'
+        self.synchronous = 'NORMAL'
+        # Rows per chunk when streaming input files through validation
+        self.validation_chunk_size = 100000
+        # Worker processes for per-file validation, 1 disables the process pool
+        self.ingestion_workers = os.cpu_count() or 1
+        # Seconds between checks of the model directory version by the model registry
+        self.model_check_interval = 5
+        # Elbow search: parallel fits, 'full', 'sample' or 'minibatch' mode, and stop once the knee is stable
+        self.elbow_workers = os.cpu_count() or 1
+        self.elbow_mode = 'full'
+        self.elbow_sample_size = 50000
+        self.elbow_early_stop = False
+        # Cores shared by concurrent cluster trainings and their grid searches, and the cap on concurrent clusters
+        self.training_cpu_budget = os.cpu_count() or 1
+        self.cluster_workers = os.cpu_count() or 1
+        # Hyperparameter search: 'grid', 'random' (search_iterations candidates) or 'halving'
+        # (successive halving on training rows, starting from search_min_resources rows per candidate)
+        self.search_strategy = 'grid'
+        self.search_iterations = 20
+        self.search_min_resources = 'exhaust'
+        # /predict micro-batching: seconds to wait for more requests after the first one, and largest batch
+        self.batch_window = 0.005
+        self.batch_max_size = 256
+        # Seconds a /predict request waits for its batch after the batch window, 503 once it expires
+        self.batch_score_timeout = 10
+        # Server worker processes forked after the models are loaded, 1 serves from a single process
+        self.server_workers = os.cpu_count() or 1
+        # Background training jobs: database of the job table, jobs running at once and idle poll seconds
+        self.jobs_database = 'jobs'
+        self.training_job_workers = 1
+        self.job_poll_interval = 2
+        # Seconds after its claim a running job without training process is taken as abandoned
+        self.job_claim_timeout = 60
+        # Rows per chunk read, preprocessed and scored by batch prediction, bounds its peak memory
+        self.prediction_chunk_size = 50000
+        # Build the one-hot training columns as sparse columns, for wide categoricals
+        self.sparse_encoding = False
+        # Imputation: neighbors averaged, complete training rows kept as candidates, and 'statistical' (medians)
+        # or 'neighbors' for the online /predict path
+        self.imputer_neighbors = 3
+        self.imputer_reference_size = 100000
+        self.online_imputation = 'statistical'
+        # Logging: default level, level per module (e.g. {'MicroBatcher': 'WARNING'} silences per-request
+        # messages), and rotation size and backups of each run log file
+        self.log_level = 'INFO'
+        self.module_log_levels = {}
+        self.log_max_bytes = 10 * 1024 * 1024
+        self.log_backup_count = 5
+        # Upper bounds in seconds of the serving latency histogram buckets exposed by /metrics
+        self.latency_buckets = [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+        # Mode the arrays of saved models are memory-mapped with when loaded ('r' read-only), None reads them in
+        self.model_mmap_mode = 'r'
+        # Compiled tree engine: compile and verify the cluster models at training, and score cluster blocks of
+        # up to compiled_max_rows rows with it. Larger blocks are faster with the library predict.
+        self.compiled_inference = True
+        self.compiled_max_rows = 32
+        # Route prediction rows with the centroids extracted at training instead of KMeans.predict
+        self.centroid_routing = True
 
     def get_run_id(self):
         """
@@ -1,6 +1,10 @@
+import hashlib
+import json
 import pickle
 import os
 import shutil
+import joblib
+from apps.core.config import Config
 from apps.core.logger import Logger
 
 class FileOperation:
@@ -16,14 +20,36 @@ class FileOperation:
     * who       when        version     change (include bug = if apply)
     * -----     -------     -------     -------------------------------
     * Ray       03/29/2023  1.0         Initial Creation
+    * Ray       10/18/2026  1.1         Cluster to model manifest
+    * Ray       10/18/2026  1.2         Preprocessing pipeline in the manifest
+    * Ray       10/18/2026  1.3         Memory-mappable joblib model files
+    * Ray       10/18/2026  1.4         Compiled cluster models in the manifest
+    * Ray       10/18/2026  1.5         Cluster router in the manifest
+    * Ray       10/18/2026  1.6         Model version in the manifest
+    * Ray       10/18/2026  1.7         bug = replace model files without removing their directory, load the hashed file
+    * Ray       10/18/2026  1.8         bug = models of each training in a directory of their own, published by the manifest
     *
     *
-    * Description: Class for file Operation
+    * Description: Class for file Operation. Models are saved as uncompressed joblib files, whose arrays are
+    *               memory-mapped on load: loading does not read the file into memory, and plain array
+    *               payloads are shared through the page cache by every process that maps the same file.
+    *               Each training saves its models in apps/models/<run_id>, never over the models in use.
+    *               They are published all at once when the manifest pointing at them replaces the previous
+    *               one, and the directories of the previous manifest are removed after that. Pickle .sav
+    *               files and model directories of earlier trainings are still loaded.
     """
 
+    # Parsed manifest shared by every instance, keyed by the manifest file (mtime, size)
+    manifest_cache = None
+    manifest_stat = None
+
     def __init__(self, run_id, data_path, mode):
         self.run_id = run_id
         self.data_path = data_path
+        self.models_path = 'apps/models/'
+        self.manifest_path = self.models_path + 'manifest.json'
+        self.run_models_path = self.models_path + str(run_id) + '/' # Models saved by this training run
+        self.mmap_mode = Config().model_mmap_mode
         self.logger = Logger(self.run_id, 'FileOperation', mode)
 
     def save_model(self, model, file_name):
@@ -35,6 +61,9 @@ class FileOperation:
         * who       when        version     change (include bug = if apply)
         * -----     -------     -------     -------------------------------
         * Ray       03/29/2023  1.0         Initial Creation
+        * Ray       10/18/2026  1.3         joblib file, replaced atomically
+        * Ray       10/18/2026  1.7         bug = keep the directory, the old file is replaced and then cleaned up
+        * Ray       10/18/2026  1.8         bug = save in the directory of the training run, the models in use are untouched
         *
         * Parameters:
         *   model
@@ -42,14 +71,12 @@ class FileOperation:
         """
         try:
             self.logger.info('Start of Save Models')
-            path = os.path.join('apps/models/', file_name) # Create separate directory for each cluster
-            if os.path.isdir(path): # Remove previously existing models for each clusters
-                shutil.rmtree('apps/models')
-                os.makedirs(path)
-            else:
-                os.makedirs(path)
-            with open(path + '/' + file_name + '.sav', 'wb') as f:
-                pickle.dump(model, f) # save the model to file
+            os.makedirs(self.run_models_path, exist_ok = True)
+            # Uncompressed so the arrays can be memory-mapped. The run directory is not published yet, and
+            # the temporary file keeps a partial dump from taking the name of a model of a rerun job.
+            file_path = self.run_models_path + file_name + '.joblib'
+            joblib.dump(model, file_path + '.tmp')
+            os.replace(file_path + '.tmp', file_path)
             self.logger.info('Model File ' + file_name + ' saved')
             self.logger.info('End of Save Models')
             return 'success'
@@ -66,50 +93,331 @@ class FileOperation:
         * who       when        version     change (include bug = if apply)
         * -----     -------     -------     -------------------------------
         * Ray       03/29/2023  1.0         Initial Creation
+        * Ray       10/18/2026  1.3         Memory-mapped joblib file
         *
         * Parameters:
         *   file_name
         """
         try:
             self.logger.info('Start of Load Model')
-            with open('apps/models/' + file_name + '/' + file_name + '.sav', 'rb') as f:
-                self.logger.info('Model File ' + file_name + ' loaded')
-                self.logger.info('End of Load Model')
-                return pickle.load(f)
+            model = self.load_file(self.model_file_path(file_name))
+            self.logger.info('Model File ' + file_name + ' loaded')
+            self.logger.info('End of Load Model')
+            return model
         except Exception as e:
             self.logger.exception('Exception raised while Loading Model: %s' % e)
             raise Exception()
 
+    def load_file(self, file_path):
+        """
+        * Method: load_file
+        * Description: method to load a model file, memory-mapping the arrays of a joblib file with
+        *               Config.model_mmap_mode. Pickle .sav files are unpickled from the file.
+        :return: Model
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.3         Initial Creation
+        *
+        * Parameters:
+        *   file_path
+        """
+        if file_path.endswith('.sav'):
+            with open(file_path, 'rb') as f:
+                return pickle.load(f)
+        return joblib.load(file_path, mmap_mode = self.mmap_mode)
+
+    def model_file_path(self, file_name):
+        """
+        * Method: model_file_path
+        * Description: method to get the path of a model file saved by this training run. A model the run has
+        *               not saved is looked up in the directory per model of earlier trainings, as a joblib
+        *               file or else as a pickle file.
+        :return: Model file path
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.1         Initial Creation
+        * Ray       10/18/2026  1.3         joblib model files
+        * Ray       10/18/2026  1.8         Directory of the training run
+        *
+        * Parameters:
+        *   file_name
+        """
+        if os.path.exists(self.run_models_path + file_name + '.joblib'):
+            return self.run_models_path + file_name + '.joblib'
+        file_path = self.models_path + file_name + '/' + file_name
+        if not os.path.exists(file_path + '.joblib') and os.path.exists(file_path + '.sav'):
+            return file_path + '.sav'
+        return file_path + '.joblib'
+
+    def file_checksum(self, file_path):
+        """
+        * Method: file_checksum
+        * Description: method to compute the sha256 checksum of a file, reading it in blocks
+        :return: Hex digest
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.3         Initial Creation
+        *
+        * Parameters:
+        *   file_path
+        """
+        with open(file_path, 'rb') as f:
+            return self.read_checksum(f)
+
+    def read_checksum(self, f):
+        """
+        * Method: read_checksum
+        * Description: method to compute the sha256 checksum of an open binary file, reading it in blocks from
+        *               its current position to the end
+        :return: Hex digest
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.7         Initial Creation
+        *
+        * Parameters:
+        *   f: binary file object
+        """
+        checksum = hashlib.sha256()
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            checksum.update(block)
+        return checksum.hexdigest()
+
+    def manifest_entry(self, file_name, algorithm):
+        """
+        * Method: manifest_entry
+        * Description: method to describe a saved model for the manifest
+        :return: Dictionary with model name, algorithm, file path and sha256 checksum
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.1         Initial Creation
+        * Ray       10/18/2026  1.3         Checksum read in blocks
+        *
+        * Parameters:
+        *   file_name
+        *   algorithm
+        """
+        file_path = self.model_file_path(file_name)
+        return {'model_name': file_name, 'algorithm': algorithm, 'file_path': file_path, 'checksum': self.file_checksum(file_path)}
+
+    def manifest_directories(self, manifest):
+        """
+        * Method: manifest_directories
+        * Description: method to get the directories of the model files listed in a manifest
+        :return: Set of directory paths
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.8         Initial Creation
+        *
+        * Parameters:
+        *   manifest: manifest dictionary, None for no manifest
+        """
+        if manifest is None:
+            return set()
+        entries = [manifest[name] for name in ['Preprocessor', 'KMeans', 'ClusterRouter'] if name in manifest]
+        for entry in manifest.get('clusters', {}).values():
+            entries.append(entry)
+            if 'compiled' in entry:
+                entries.append(entry['compiled'])
+        return {os.path.normpath(os.path.dirname(entry['file_path'])) for entry in entries}
+
+    def remove_model_directories(self, directories):
+        """
+        * Method: remove_model_directories
+        * Description: method to remove model directories no longer listed in the manifest. Processes still
+        *               mapping their files keep reading them until they unmap them.
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.8         Initial Creation
+        *
+        * Parameters:
+        *   directories: directory paths under apps/models
+        """
+        models_path = os.path.normpath(self.models_path)
+        for directory in map(os.path.normpath, directories):
+            # Only directories inside apps/models, never apps/models itself
+            if os.path.dirname(directory) == models_path and os.path.isdir(directory):
+                shutil.rmtree(directory, ignore_errors = True)
+                self.logger.info('Model directory ' + directory + ' removed')
+
+    def discard_run_models(self):
+        """
+        * Method: discard_run_models
+        * Description: method to remove the models saved by a failed training run, unless the manifest lists them
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.8         Initial Creation
+        *
+        * Parameters:
+        *   none
+        """
+        try:
+            published = self.manifest_directories(self.read_manifest())
+            if os.path.normpath(self.run_models_path) not in published:
+                self.remove_model_directories([self.run_models_path])
+        except Exception as e:
+            self.logger.exception('Exception raised while Discarding Run Models: %s' % e)
+            raise Exception()
+
+    def read_manifest(self):
+        """
+        * Method: read_manifest
+        * Description: method to read the manifest file as it is now, without the shared cache
+        :return: Manifest dictionary, None if there is no manifest
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.8         Initial Creation
+        *
+        * Parameters:
+        *   none
+        """
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path, 'r') as f:
+            return json.load(f)
+
+    def write_manifest(self, cluster_models, router_name = None):
+        """
+        * Method: write_manifest
+        * Description: method to write the manifest mapping every cluster to its saved model,
+        *               with the preprocessing pipeline and KMeans model entries. The compiled model of a cluster
+        *               is described under the 'compiled' key of its entry, and the cluster router under 'ClusterRouter'.
+        *               The training run id is the version of the models. Replacing the manifest publishes the
+        *               models of the run at once. The directories of the previous manifest are removed after that.
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.1         Initial Creation
+        * Ray       10/18/2026  1.4         Compiled cluster models
+        * Ray       10/18/2026  1.5         Cluster router
+        * Ray       10/18/2026  1.6         Model version
+        * Ray       10/18/2026  1.8         Remove the models of the previous manifest once replaced
+        *
+        * Parameters:
+        *   cluster_models: dictionary of cluster number to (algorithm, model file name, compiled file name or None)
+        *   router_name: model file name of the cluster router, None without one
+        """
+        try:
+            self.logger.info('Start of Writing Model Manifest')
+            clusters = {}
+            for cluster, (algorithm, file_name, compiled_name) in cluster_models.items():
+                clusters[str(int(cluster))] = self.manifest_entry(file_name, algorithm)
+                if compiled_name is not None:
+                    clusters[str(int(cluster))]['compiled'] = self.manifest_entry(compiled_name, 'Compiled' + algorithm)
+            manifest = {'version': str(self.run_id),
+                        'Preprocessor': self.manifest_entry('Preprocessor', 'PreprocessingPipeline'),
+                        'KMeans': self.manifest_entry('KMeans', 'KMeans'),
+                        'clusters': clusters}
+            if router_name is not None:
+                manifest['ClusterRouter'] = self.manifest_entry(router_name, 'ClusterRouter')
+            previous = self.manifest_directories(self.read_manifest())
+            # Write to a temporary file first so readers never see a partial manifest
+            with open(self.manifest_path + '.tmp', 'w') as f:
+                json.dump(manifest, f, indent = 2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(self.manifest_path + '.tmp', self.manifest_path)
+            # The previous models are no longer published, their directories can go
+            self.remove_model_directories(previous - self.manifest_directories(manifest))
+            self.logger.info('End of Writing Model Manifest')
+        except Exception as e:
+            self.logger.exception('Exception raised while Writing Model Manifest: %s' % e)
+            raise Exception()
+
+    def load_manifest(self):
+        """
+        * Method: load_manifest
+        * Description: method to get the model manifest, parsed only when the manifest file changes
+        :return: Manifest dictionary
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.1         Initial Creation
+        *
+        * Parameters:
+        *   none
+        """
+        try:
+            stat = os.stat(self.manifest_path)
+            manifest_stat = (stat.st_mtime_ns, stat.st_size)
+            if FileOperation.manifest_stat != manifest_stat:
+                with open(self.manifest_path, 'r') as f:
+                    FileOperation.manifest_cache = json.load(f)
+                FileOperation.manifest_stat = manifest_stat
+                self.logger.info('Model Manifest loaded')
+            return FileOperation.manifest_cache
+        except Exception as e:
+            self.logger.exception('Exception raised while Loading Model Manifest: %s' % e)
+            raise Exception()
+
+    def load_manifest_model(self, entry):
+        """
+        * Method: load_manifest_model
+        * Description: method to load a model described by a manifest entry, verifying its checksum. The file
+        *               is opened once and hashed in blocks from that descriptor, it is never held in memory as
+        *               a whole. A pickle file or a joblib file without memory mapping is loaded from the same
+        *               descriptor. A memory-mapped joblib file is loaded by path, and the path must still be
+        *               the hashed file afterwards, so a file replaced in between is not loaded unverified.
+        :return: Model
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.1         Initial Creation
+        * Ray       10/18/2026  1.3         Memory-mapped joblib file
+        * Ray       10/18/2026  1.7         bug = load the file that was hashed
+        *
+        * Parameters:
+        *   entry: manifest entry
+        """
+        try:
+            file_path = entry['file_path']
+            with open(file_path, 'rb') as f:
+                if self.read_checksum(f) != entry['checksum']:
+                    raise ValueError('Checksum mismatch for model file ' + file_path)
+                f.seek(0)
+                if file_path.endswith('.sav'):
+                    model = pickle.load(f)
+                elif self.mmap_mode is None:
+                    model = joblib.load(f)
+                else:
+                    model = joblib.load(file_path, mmap_mode = self.mmap_mode)
+                    hashed, loaded = os.fstat(f.fileno()), os.stat(file_path)
+                    if (hashed.st_dev, hashed.st_ino) != (loaded.st_dev, loaded.st_ino):
+                        raise ValueError('Model file ' + file_path + ' was replaced while it was loaded')
+            self.logger.info('Model File ' + entry['model_name'] + ' loaded')
+            return model
+        except Exception as e:
+            self.logger.exception('Exception raised while Loading Manifest Model: %s' % e)
+            raise Exception()
+
     def correct_model(self, cluster_number):
         """
-        * Method: load_model
-        * Description: method to find the best model
+        * Method: correct_model
+        * Description: method to find the best model of a cluster from the model manifest
         :return: Model File
         *
         * who       when        version     change (include bug = if apply)
         * -----     -------     -------     -------------------------------
         * Ray       03/29/2023  1.0         Initial Creation
+        * Ray       10/18/2026  1.1         Resolve from the manifest instead of scanning apps/models
         *
         * Parameters:
         *   cluster_number
         """
         try:
-            self.logger.info('Start of finding Correct Model')
-            self.cluster_number = cluster_number
-            self.folder_name = 'apps/models'
-            self.list_of_model_files = []
-            self.list_of_files = os.listdir(self.folder_name)
-            for self.file in self.list_of_files:
-                try:
-                    if (self.file.index(str(self.cluster_number)) != -1):
-                        self.model_name = self.file
-                except:
-                    continue
-            self.model_name = self.model_name.split('.')[0]
-            self.logger.info('End of finding Correct Model')
+            self.model_name = self.load_manifest()['clusters'][str(int(cluster_number))]['model_name']
             return self.model_name
         except Exception as e:
             self.logger.info('Exception raised while finding correct model' + str(e))
             raise Exception()
-
-
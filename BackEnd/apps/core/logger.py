@@ -1,5 +1,11 @@
-from datetime import datetime
+import atexit
 import logging
+import multiprocessing.util
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from apps.core.config import Config
 
 
 class Logger:
@@ -15,25 +21,271 @@ class Logger:
     * who       when        version     change (include bug = if apply)
     * -----     -------     -------     -------------------------------
     * Ray       03/29/2023  1.0         Initial Creation
+    * Ray       10/18/2026  1.1         Attach the file handler only once per logger
+    * Ray       10/18/2026  1.2         One queue-backed rotating handler per run with a background writer
+    * Ray       10/18/2026  1.3         bug = long-lived forked workers rotate their own per-process log files
+    * Ray       10/18/2026  1.4         bug = release the loggers of a closed run, reopen it on a later record
     *
     *
-    * Description: Class to generate logs
+    * Description: Class to generate logs. Every module logger of a run shares one log file: records are put
+    *               on a queue and written by a background listener thread, through a rotating file handler
+    *               opened once per run. Levels come from Config.log_level and Config.module_log_levels.
+    *               Logger.close releases the handler and loggers of a finished run, and queued records are
+    *               flushed when the process exits. A record logged after its run was closed opens it again.
+    *               Forked processes restart the writer thread and leave rotation to the process that opened
+    *               the file. Long-lived forked workers, like the prefork server workers, call Logger.own_files
+    *               to write and rotate a log file of their own, suffixed with their pid.
     """
+    # Process-wide state: log file path to (run logger, queue handler, listener, file handler)
+    lock = threading.Lock()
+    runs = {}
+    exit_hook_pid = None
+    per_process = False # Log files of this process are suffixed with its pid
 
     def __init__(self, run_id, log_module, log_file_name):
-        self.logger = logging.getLogger(str(log_module) + '_' + str(run_id))
-        self.logger.setLevel(logging.DEBUG)
+        self.run_id = run_id
+        self.log_module = str(log_module)
+        self.log_file_name = log_file_name
+        self.path = Logger.log_path(run_id, log_file_name)
+        self.open()
+
+    def open(self):
+        """
+        * Method: open
+        * Description: method to get the module logger, opening the run the first time or after it was closed.
+        *               A closed run is opened with a new run logger, so module loggers of the closed one are
+        *               found by their parent.
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.4         Initial Creation
+        *
+        * Parameters:
+        *   none
+        """
+        config = Config()
+        run_logger = Logger.open_run(self.run_id, self.log_file_name, config)
+        self.logger = logging.getLogger(run_logger.name + '.' + self.log_module)
+        self.logger.setLevel(config.module_log_levels.get(self.log_module, config.log_level))
+
+    @staticmethod
+    def log_path(run_id, log_file_name):
+        """
+        * Method: log_path
+        * Description: method to get the log file of a run
+        :return: Log file path
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.2         Initial Creation
+        *
+        * Parameters:
+        *   run_id
+        *   log_file_name: 'training' or 'prediction'
+        """
         if log_file_name == "training":
-            file_handler = logging.FileHandler('logs/training_logs/train_log_' + str(run_id) + '.log')
-        else:
-            file_handler = logging.FileHandler('logs/prediction_logs/prediction_log_' + str(run_id) + '.log')
+            return 'logs/training_logs/train_log_' + str(run_id) + '.log'
+        return 'logs/prediction_logs/prediction_log_' + str(run_id) + '.log'
+
+    @staticmethod
+    def file_handler(path, config):
+        """
+        * Method: file_handler
+        * Description: method to open the rotating file handler of a run log file, the file of this process
+        *               when it writes its own
+        :return: RotatingFileHandler
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.3         Initial Creation
+        *
+        * Parameters:
+        *   path: log file path of the run
+        *   config
+        """
+        if Logger.per_process:
+            path = path[:-len('.log')] + '_' + str(os.getpid()) + '.log'
+        file_handler = RotatingFileHandler(path, maxBytes = config.log_max_bytes, backupCount = config.log_backup_count)
+        file_handler.setFormatter(logging.Formatter('%(asctime)s : %(levelname)s : %(message)s'))
+        return file_handler
+
+    @staticmethod
+    def open_run(run_id, log_file_name, config):
+        """
+        * Method: open_run
+        * Description: method to get the logger of a run, opening its file handler and writer thread the first time
+        :return: Run logger, parent of the module loggers
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.2         Initial Creation
+        *
+        * Parameters:
+        *   run_id
+        *   log_file_name: 'training' or 'prediction'
+        *   config
+        """
+        path = Logger.log_path(run_id, log_file_name)
+        with Logger.lock:
+            Logger.register_exit_hook()
+            if path not in Logger.runs:
+                file_handler = Logger.file_handler(path, config)
+                records = queue.Queue()
+                queue_handler = QueueHandler(records)
+                listener = QueueListener(records, file_handler)
+                listener.start()
+                run_logger = logging.getLogger('apps.' + ('training' if log_file_name == "training" else 'prediction') + '.' + str(run_id))
+                run_logger.setLevel(logging.DEBUG)
+                run_logger.propagate = False
+                run_logger.addHandler(queue_handler)
+                Logger.runs[path] = (run_logger, queue_handler, listener, file_handler)
+            return Logger.runs[path][0]
+
+    @staticmethod
+    def close(run_id, log_file_name):
+        """
+        * Method: close
+        * Description: method to flush and release the log file of a finished run, and to drop its run and
+        *               module loggers from the logging manager, which would otherwise keep them forever
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.2         Initial Creation
+        * Ray       10/18/2026  1.4         Drop the loggers of the run
+        *
+        * Parameters:
+        *   run_id
+        *   log_file_name: 'training' or 'prediction'
+        """
+        with Logger.lock:
+            run = Logger.runs.pop(Logger.log_path(run_id, log_file_name), None)
+        if run is not None:
+            run_logger, queue_handler, listener, file_handler = run
+            run_logger.removeHandler(queue_handler)
+            listener.stop()
+            file_handler.close()
+            loggers = logging.Logger.manager.loggerDict
+            for name in [name for name in list(loggers) if name == run_logger.name or name.startswith(run_logger.name + '.')]:
+                loggers.pop(name, None)
+
+    @staticmethod
+    def shutdown():
+        """
+        * Method: shutdown
+        * Description: method to flush and release the log files of every run, called when the process exits
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.2         Initial Creation
+        *
+        * Parameters:
+        *   none
+        """
+        with Logger.lock:
+            runs = list(Logger.runs.values())
+            Logger.runs.clear()
+        for run_logger, queue_handler, listener, file_handler in runs:
+            run_logger.removeHandler(queue_handler)
+            listener.stop()
+            file_handler.close()
 
-        formatter = logging.Formatter('%(asctime)s : %(levelname)s : %(message)s')
-        file_handler.setFormatter(formatter)
-        self.logger.addHandler(file_handler)
+    @staticmethod
+    def register_exit_hook():
+        """
+        * Method: register_exit_hook
+        * Description: method to flush the logs at exit, once per process. multiprocessing children leave with
+        *               os._exit, which skips atexit but runs the multiprocessing finalizers.
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.2         Initial Creation
+        *
+        * Parameters:
+        *   none
+        """
+        if Logger.exit_hook_pid != os.getpid():
+            Logger.exit_hook_pid = os.getpid()
+            atexit.register(Logger.shutdown)
+            multiprocessing.util.Finalize(None, Logger.shutdown, exitpriority = 100)
+
+    @staticmethod
+    def after_fork():
+        """
+        * Method: after_fork
+        * Description: method run in a forked child: threads are not copied by fork, so every run gets a new
+        *               queue and writer thread. Rotation is left to the parent that owns the file, until the
+        *               child calls own_files.
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.2         Initial Creation
+        *
+        * Parameters:
+        *   none
+        """
+        Logger.lock = threading.Lock()
+        for path, (run_logger, queue_handler, listener, file_handler) in list(Logger.runs.items()):
+            file_handler.maxBytes = 0
+            records = queue.Queue()
+            queue_handler.queue = records
+            listener = QueueListener(records, file_handler)
+            listener.start()
+            Logger.runs[path] = (run_logger, queue_handler, listener, file_handler)
+
+    @staticmethod
+    def own_files():
+        """
+        * Method: own_files
+        * Description: method run in a long-lived forked worker to write the runs to log files of its own, which
+        *               it rotates. Files shared with the parent are never rotated by a child, so a worker
+        *               writing most of the logs would otherwise grow them without limit.
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.3         Initial Creation
+        *
+        * Parameters:
+        *   none
+        """
+        config = Config()
+        with Logger.lock:
+            Logger.per_process = True
+            for path, (run_logger, queue_handler, listener, file_handler) in list(Logger.runs.items()):
+                # Records queued so far go to the shared file
+                listener.stop()
+                file_handler.close()
+                file_handler = Logger.file_handler(path, config)
+                listener = QueueListener(queue_handler.queue, file_handler)
+                listener.start()
+                Logger.runs[path] = (run_logger, queue_handler, listener, file_handler)
+
+    def debug(self, message):
+        if Logger.runs.get(self.path, (None,))[0] is not self.logger.parent:
+            self.open()
+        self.logger.debug(message)
 
     def info(self, message):
+        if Logger.runs.get(self.path, (None,))[0] is not self.logger.parent:
+            self.open()
         self.logger.info(message)
 
+    def warning(self, message):
+        if Logger.runs.get(self.path, (None,))[0] is not self.logger.parent:
+            self.open()
+        self.logger.warning(message)
+
     def exception(self, message):
-        self.logger.exception(message)
\ No newline at end of file
+        if Logger.runs.get(self.path, (None,))[0] is not self.logger.parent:
+            self.open()
+        self.logger.exception(message)
+
+
+# Restart the writer threads in forked children: prefork server workers and fork-started pool workers
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child = Logger.after_fork)
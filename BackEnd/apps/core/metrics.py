@@ -0,0 +1,392 @@
+import bisect
+import json
+import mmap
+import multiprocessing
+import os
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+from apps.core.config import Config
+
+try:
+    import resource
+except ImportError: # Not available on Windows, peak memory is then not recorded
+    resource = None
+
+# Peak resident memory megabytes of the process before VmHWM was last reset, the reset also clears ru_maxrss
+peak_before_reset_mb = 0.0
+
+def process_peak_rss_mb():
+    """
+    * Method: process_peak_rss_mb
+    * Description: method to get the peak resident memory of the process and its waited children since they started
+    :return: Megabytes, None where the resource module is not available
+    *
+    * who       when        version     change (include bug = if apply)
+    * -----     -------     -------     -------------------------------
+    * Ray       10/18/2026  1.0         Initial Creation
+    * Ray       10/18/2026  1.1         Renamed from peak_rss_mb, it is the peak of the process lifetime
+    *
+    * Parameters:
+    *   none
+    """
+    if resource is None:
+        return None
+    return round(max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+                     resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+                     rss_status()[1] or 0.0, peak_before_reset_mb), 1)
+
+def rss_status():
+    """
+    * Method: rss_status
+    * Description: method to read the current and peak resident memory of the process from /proc/self/status
+    :return: Tuple of VmRSS and VmHWM megabytes, None values where /proc is not available
+    *
+    * who       when        version     change (include bug = if apply)
+    * -----     -------     -------     -------------------------------
+    * Ray       10/18/2026  1.1         Initial Creation
+    *
+    * Parameters:
+    *   none
+    """
+    values = {}
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith(('VmRSS:', 'VmHWM:')):
+                    values[line[:5]] = round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return values.get('VmRSS'), values.get('VmHWM')
+
+def reset_peak_rss():
+    """
+    * Method: reset_peak_rss
+    * Description: method to reset the VmHWM peak of the process to its current resident memory, by writing 5
+    *               to /proc/self/clear_refs (Linux 4.0 and later). The peak so far is kept for process_peak_rss_mb.
+    :return: True if the peak was reset
+    *
+    * who       when        version     change (include bug = if apply)
+    * -----     -------     -------     -------------------------------
+    * Ray       10/18/2026  1.1         Initial Creation
+    *
+    * Parameters:
+    *   none
+    """
+    global peak_before_reset_mb
+    peak_before_reset_mb = process_peak_rss_mb() or 0.0
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+class LatencyHistogram:
+    """
+    * Description: latency histogram with fixed buckets. The counters live in anonymous shared memory, so a
+    *               histogram created before the server forks is shared by every worker.
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        # Layout: one count per bucket, the +Inf count, the sum of the observations and their count
+        self.memory = mmap.mmap(-1, 8 * (len(self.buckets) + 3))
+        self.values = np.frombuffer(self.memory, dtype = np.float64)
+        self.lock = multiprocessing.Lock()
+
+    def observe(self, seconds):
+        """
+        * Method: observe
+        * Description: method to add one observation
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   seconds
+        """
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self.lock:
+            self.values[i] += 1
+            self.values[-2] += seconds
+            self.values[-1] += 1
+
+    def snapshot(self):
+        """
+        * Method: snapshot
+        * Description: method to read the cumulative bucket counts, sum and count
+        :return: Tuple of list of (upper bound, cumulative count), sum and count
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   none
+        """
+        with self.lock:
+            values = self.values.copy()
+        cumulative = np.cumsum(values[:-2])
+        bounds = [str(bucket) for bucket in self.buckets] + ['+Inf']
+        return list(zip(bounds, cumulative.astype(np.int64).tolist())), float(values[-2]), int(values[-1])
+
+
+class Metrics:
+    """
+    *
+    * filename: metrics.py
+    * version: 1.0
+    * author: Ray Joshi
+    * Creation date: 10/18/2026
+    *
+    * Change History:
+    *
+    * who       when        version     change (include bug = if apply)
+    * -----     -------     -------     -------------------------------
+    * Ray       10/18/2026  1.0         Initial Creation
+    * Ray       10/18/2026  1.1         bug = resident memory of each stage instead of the process lifetime peak
+    * Ray       10/18/2026  1.2         bug = reset the peak only in processes that run their stages alone
+    *
+    *
+    * Description: Class to instrument the stages of a run. Each stage records its wall time, CPU time of the
+    *               process and its waited children, rows processed, resident memory at its start and end and
+    *               its own peak, and is appended as one JSON line to the metrics file of the run.
+    *               The stage peak is read from VmHWM, reset when a stage starts; the peaks of the enclosing
+    *               stages are carried over before each reset. The reset clears the peak of the whole process,
+    *               so it is only done where Metrics.reset_peaks is set, in the training job process and the
+    *               benchmark scale process. Elsewhere, as in the server, stages only sample the resident
+    *               memory and their peak is not recorded. Serving latency histograms are kept
+    *               process-wide and exposed in the Prometheus text format by the /metrics endpoint.
+    """
+    # Process-wide latency histograms by name
+    lock = threading.Lock()
+    histograms = {}
+    # Memory of the stages in progress in this process, see memory_start
+    open_stages = []
+    # Reset VmHWM when a stage starts, set by processes that do not serve requests
+    reset_peaks = False
+
+    def __init__(self, run_id, mode):
+        self.run_id = run_id
+        self.mode = mode
+        if mode == 'training':
+            self.path = 'logs/training_logs/metrics_' + str(run_id) + '.jsonl'
+        else:
+            self.path = 'logs/prediction_logs/metrics_' + str(run_id) + '.jsonl'
+
+    @staticmethod
+    def memory_start():
+        """
+        * Method: memory_start
+        * Description: method to start following the memory of a stage. The peak so far is added to the stages
+        *               in progress before VmHWM is reset, so it still covers the enclosing stages. Without
+        *               Metrics.reset_peaks only the resident memory is sampled.
+        :return: Dictionary of the stage memory, passed to memory_end
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.1         Initial Creation
+        * Ray       10/18/2026  1.2         Reset only when Metrics.reset_peaks is set
+        *
+        * Parameters:
+        *   none
+        """
+        with Metrics.lock:
+            rss, hwm = rss_status()
+            memory = {'start': rss, 'peak': None}
+            if Metrics.reset_peaks and hwm is not None and reset_peak_rss():
+                for other in Metrics.open_stages:
+                    if other['peak'] is not None:
+                        other['peak'] = max(other['peak'], hwm)
+                memory['peak'] = rss
+            Metrics.open_stages.append(memory)
+        return memory
+
+    @staticmethod
+    def after_fork():
+        """
+        * Method: after_fork
+        * Description: method run in a forked child, the stages in progress and the peak memory are the parent's
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.1         Initial Creation
+        *
+        * Parameters:
+        *   none
+        """
+        global peak_before_reset_mb
+        peak_before_reset_mb = 0.0
+        Metrics.lock = threading.Lock()
+        Metrics.open_stages = []
+
+    @staticmethod
+    def memory_end(memory):
+        """
+        * Method: memory_end
+        * Description: method to stop following the memory of a stage
+        :return: Dictionary of the rss_start_mb, rss_end_mb, rss_delta_mb and stage_peak_rss_mb fields, None
+        *               where they cannot be read or the peak is not reset, and process_peak_rss_mb, the peak
+        *               of the process lifetime
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.1         Initial Creation
+        *
+        * Parameters:
+        *   memory: dictionary returned by memory_start
+        """
+        with Metrics.lock:
+            rss, hwm = rss_status()
+            Metrics.open_stages = [other for other in Metrics.open_stages if other is not memory]
+            if memory['peak'] is not None and hwm is not None:
+                memory['peak'] = max(memory['peak'], hwm)
+        delta = None if rss is None or memory['start'] is None else round(rss - memory['start'], 1)
+        return {'rss_start_mb': memory['start'], 'rss_end_mb': rss, 'rss_delta_mb': delta,
+                'stage_peak_rss_mb': memory['peak'], 'process_peak_rss_mb': process_peak_rss_mb()}
+
+    @contextmanager
+    def stage(self, name, rows = None):
+        """
+        * Method: stage
+        * Description: method to time a block as a stage. The rows can be given or set on the yielded record.
+        :return: Context manager yielding the stage record
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        * Ray       10/18/2026  1.1         Memory at the start and end of the stage and its own peak
+        *
+        * Parameters:
+        *   name: stage name
+        *   rows: rows processed by the stage
+        """
+        record = {'run_id': self.run_id, 'stage': name, 'rows': rows, 'pid': os.getpid()}
+        memory = Metrics.memory_start()
+        times = os.times()
+        start = time.perf_counter()
+        try:
+            yield record
+            record['status'] = 'succeeded'
+        except BaseException:
+            record['status'] = 'failed'
+            raise
+        finally:
+            end_times = os.times()
+            record['wall_seconds'] = round(time.perf_counter() - start, 4)
+            record['cpu_seconds'] = round(sum(end_times[:4]) - sum(times[:4]), 4)
+            record.update(Metrics.memory_end(memory))
+            record['finished_at'] = time.time()
+            self.write(record)
+
+    def write(self, record):
+        """
+        * Method: write
+        * Description: method to append a stage record to the metrics file of the run
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   record
+        """
+        # One write per line in append mode, so records from pool workers do not interleave
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+
+    def read(self):
+        """
+        * Method: read
+        * Description: method to read the stage records of the run
+        :return: List of stage records, empty if the run has no metrics file
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   none
+        """
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, 'r') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    @staticmethod
+    def histogram(name):
+        """
+        * Method: histogram
+        * Description: method to get the latency histogram of a name, created with Config.latency_buckets.
+        *               Histograms created before the server forks are shared by every worker.
+        :return: LatencyHistogram
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   name
+        """
+        with Metrics.lock:
+            if name not in Metrics.histograms:
+                Metrics.histograms[name] = LatencyHistogram(Config().latency_buckets)
+            return Metrics.histograms[name]
+
+    @staticmethod
+    def observe(name, seconds):
+        """
+        * Method: observe
+        * Description: method to add a latency observation to the histogram of a name
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   name
+        *   seconds
+        """
+        Metrics.histogram(name).observe(seconds)
+
+    @staticmethod
+    def exposition():
+        """
+        * Method: exposition
+        * Description: method to render the latency histograms and the process memory in the Prometheus text format
+        :return: String
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        * Ray       10/18/2026  1.1         Peak memory gauge named as the process lifetime peak
+        *
+        * Parameters:
+        *   none
+        """
+        lines = ['# HELP employeechurn_latency_seconds Latency of the served requests and prediction batches',
+                 '# TYPE employeechurn_latency_seconds histogram']
+        for name, histogram in sorted(Metrics.histograms.items()):
+            buckets, total, count = histogram.snapshot()
+            for bound, cumulative in buckets:
+                lines.append('employeechurn_latency_seconds_bucket{name="%s",le="%s"} %d' % (name, bound, cumulative))
+            lines.append('employeechurn_latency_seconds_sum{name="%s"} %.6f' % (name, total))
+            lines.append('employeechurn_latency_seconds_count{name="%s"} %d' % (name, count))
+        rss = process_peak_rss_mb()
+        if rss is not None:
+            lines.append('# HELP employeechurn_process_peak_rss_megabytes Peak resident memory of the serving process since it started')
+            lines.append('# TYPE employeechurn_process_peak_rss_megabytes gauge')
+            lines.append('employeechurn_process_peak_rss_megabytes{pid="%d"} %.1f' % (os.getpid(), rss))
+        return '\n'.join(lines) + '\n'
+
+
+# Forget the stages of the parent in forked children
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child = Metrics.after_fork)
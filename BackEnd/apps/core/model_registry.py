@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+from apps.core.config import Config
+from apps.core.file_operation import FileOperation
+from apps.core.logger import Logger
+
+# Models of one version: name, preprocessing pipeline, cluster router (or the KMeans model without one),
+# cluster number to model and cluster number to compiled model, empty without compiled models
+ModelSnapshot = namedtuple('ModelSnapshot', ['version', 'pipeline', 'router', 'cluster_models', 'compiled_models'])
+
+class ModelRegistry:
+    """
+    *
+    * filename: model_registry.py
+    * version: 1.0
+    * author: Ray Joshi
+    * Creation date: 10/18/2026
+    *
+    * Change History:
+    *
+    * who       when        version     change (include bug = if apply)
+    * -----     -------     -------     -------------------------------
+    * Ray       10/18/2026  1.0         Initial Creation
+    * Ray       10/18/2026  1.1         Resolve models from the model manifest
+    * Ray       10/18/2026  1.2         Keep the preprocessing pipeline resident
+    * Ray       10/18/2026  1.3         Forced refresh for server preloading
+    * Ray       10/18/2026  1.4         Compiled cluster models
+    * Ray       10/18/2026  1.5         Nearest-centroid cluster router
+    * Ray       10/18/2026  1.6         Version name of the resident models
+    * Ray       10/18/2026  1.7         bug = one snapshot of the models per request, a reload could mix versions
+    *
+    *
+    * Description: Class to keep the KMeans model and the cluster models resident in memory, with the
+    *               compiled cluster models when Config.compiled_inference is set and the cluster router
+    *               when Config.centroid_routing is set.
+    *               The loaded models are shared by every instance in the process and are reloaded
+    *               only when the version of the model directory changes. They are published as one
+    *               immutable ModelSnapshot, which a request or batch takes once and uses throughout, so
+    *               a reload never mixes the models of two versions.
+    """
+    # Process-wide state shared by every ModelRegistry instance
+    lock = threading.Lock()
+    version = None
+    checked_at = 0.0
+    snapshot = None
+
+    def __init__(self, run_id, data_path, mode):
+        self.run_id = run_id
+        self.data_path = data_path
+        self.check_interval = Config().model_check_interval
+        self.compiled_inference = Config().compiled_inference
+        self.centroid_routing = Config().centroid_routing
+        self.logger = Logger(self.run_id, 'ModelRegistry', mode)
+        self.fileOperation = FileOperation(self.run_id, self.data_path, mode)
+
+    def model_version(self):
+        """
+        * Method: model_version
+        * Description: method to compute the version of the model directory from the model manifest,
+        *               which training rewrites after every cluster model is saved
+        :return: Tuple of manifest modification time and size
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        * Ray       10/18/2026  1.1         Version from the model manifest
+        *
+        * Parameters:
+        *   none
+        """
+        stat = os.stat(self.fileOperation.manifest_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def load_models(self, version):
+        """
+        * Method: load_models
+        * Description: method to load the preprocessing pipeline, the KMeans model and every cluster model
+        *               listed in the manifest into the registry
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        * Ray       10/18/2026  1.1         Load models listed in the model manifest
+        * Ray       10/18/2026  1.2         Load the preprocessing pipeline
+        * Ray       10/18/2026  1.4         Load the compiled cluster models
+        * Ray       10/18/2026  1.5         Load the cluster router
+        * Ray       10/18/2026  1.6         Version name from the manifest
+        * Ray       10/18/2026  1.7         Publish the models as one snapshot
+        *
+        * Parameters:
+        *   version: model directory version returned by model_version
+        """
+        self.logger.info('Start of Loading Models into Registry...')
+        manifest = self.fileOperation.load_manifest()
+        kmeans = self.fileOperation.load_manifest_model(manifest['KMeans'])
+        cluster_models = {int(cluster): self.fileOperation.load_manifest_model(entry)
+                          for cluster, entry in manifest['clusters'].items()}
+        compiled_models = {}
+        if self.compiled_inference:
+            compiled_models = {int(cluster): self.fileOperation.load_manifest_model(entry['compiled'])
+                               for cluster, entry in manifest['clusters'].items() if 'compiled' in entry}
+        router = None
+        if self.centroid_routing and 'ClusterRouter' in manifest:
+            router = self.fileOperation.load_manifest_model(manifest['ClusterRouter'])
+        pipeline = self.fileOperation.load_manifest_model(manifest['Preprocessor'])
+        # Manifests written before the version was recorded are named by their KMeans checksum
+        version_name = manifest.get('version') or manifest['KMeans']['checksum'][:16]
+        ModelRegistry.snapshot = ModelSnapshot(version_name, pipeline, router if router is not None else kmeans,
+                                               MappingProxyType(cluster_models), MappingProxyType(compiled_models))
+        ModelRegistry.version = version
+        self.logger.info('End of Loading Models into Registry... %d cluster models and %d compiled models loaded'
+                         % (len(cluster_models), len(compiled_models)))
+
+    def refresh(self, force = False):
+        """
+        * Method: refresh
+        * Description: method to reload the models if the model directory version changed. The version is
+        *               checked at most once every Config.model_check_interval seconds.
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.2         Initial Creation, moved from get_models
+        * Ray       10/18/2026  1.3         force parameter
+        *
+        * Parameters:
+        *   force: check the version now, whatever the time since the last check
+        """
+        now = time.monotonic()
+        if force or ModelRegistry.snapshot is None or now - ModelRegistry.checked_at >= self.check_interval:
+            with ModelRegistry.lock:
+                if force or ModelRegistry.snapshot is None or now - ModelRegistry.checked_at >= self.check_interval:
+                    version = self.model_version()
+                    if version != ModelRegistry.version:
+                        self.load_models(version)
+                    ModelRegistry.checked_at = now
+
+    def get_snapshot(self):
+        """
+        * Method: get_snapshot
+        * Description: method to get the resident models, taken under the registry lock so they all come from
+        *               the same version. Callers use the snapshot for a whole request or batch.
+        :return: ModelSnapshot
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.7         Initial Creation, replaces get_models, get_pipeline and get_version_name
+        *
+        * Parameters:
+        *   none
+        """
+        try:
+            self.refresh()
+            with ModelRegistry.lock:
+                return ModelRegistry.snapshot
+        except Exception as e:
+            self.logger.exception('Exception raised while Getting Models from Registry: %s' % e)
+            raise e
@@ -1,9 +1,15 @@
 import sqlite3
 import csv
+import time
+import json
+import numpy as np
+import pandas as pd
+from itertools import islice
 from os import listdir
 import shutil
 import os
 
+from apps.core.config import Config
 from apps.core.logger import Logger
 
 class DatabaseOperation:
@@ -19,6 +25,12 @@ class DatabaseOperation:
     * who       when        version     change (include bug = if apply)
     * -----     -------     -------     -------------------------------
     * Ray       03/29/2023  1.0         Initial Creation
+    * Ray       10/18/2026  1.1         Bulk transactional insert
+    * Ray       10/18/2026  1.2         Per-file bulk insert for the parallel ingestion writer
+    * Ray       10/18/2026  1.3         Export in chunks with constant memory
+    * Ray       10/18/2026  1.4         Columnar NumPy snapshot export
+    * Ray       10/18/2026  1.5         Ingestion manifest for incremental loads
+    * Ray       10/18/2026  1.6         Indexed prediction result store
     *
     *
     * Description: Class to handle database operations
@@ -28,6 +40,7 @@ class DatabaseOperation:
         self.run_id = run_id
         self.data_path = data_path
         self.logger = Logger(self.run_id, 'DatabaseOperation', mode)
+        self.config = Config()
 
     def database_connection(self, database_name):
         """
@@ -86,7 +99,7 @@ class DatabaseOperation:
                     # In try block we check if the table exists. If yes, then add columns to the table
                     # Else in catch block, we will create the table --training_raw_data_t
                     try:
-                        conn.execute("ALTER TABLE " + table_name + " ADD COLUMN {column_name} {dataType})".format(column_name = key, dataType = type))
+                        conn.execute("ALTER TABLE " + table_name + " ADD COLUMN {column_name} {dataType}".format(column_name = key, dataType = type))
                         self.logger.info("ALTER TABLE " + table_name + " ADD COLUMN")
                     except:
                         conn.execute("CREATE TABLE " + table_name + " ({column_name} {dataType})".format(column_name = key, dataType = type))
@@ -139,6 +152,168 @@ class DatabaseOperation:
         conn.close()
         self.logger.info('End of Inserting Data into Table...')
 
+    def bulk_connection(self, database_name, journal_mode = None, synchronous = None):
+        """
+        * Method: bulk_connection
+        * Description: method to open a database connection tuned for bulk inserts
+        :return: Connection
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.2         Initial Creation
+        *
+        * Parameters:
+        *   database_name
+        *   journal_mode: SQLite journal mode, defaults to Config.journal_mode
+        *   synchronous: SQLite synchronous setting, defaults to Config.synchronous
+        """
+        conn = self.database_connection(database_name)
+        conn.execute("PRAGMA journal_mode = " + (journal_mode or self.config.journal_mode))
+        conn.execute("PRAGMA synchronous = " + (synchronous or self.config.synchronous))
+        return conn
+
+    def read_ingestion_manifest(self, database_name):
+        """
+        * Method: read_ingestion_manifest
+        * Description: method to read the files already ingested into the database, creating the manifest table
+        *               if needed. Each file keeps its size, modification time, content hash, row count,
+        *               rowid range in the raw table and the run id that ingested it.
+        :return: Dictionary of file name to manifest row
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.5         Initial Creation
+        *
+        * Parameters:
+        *   database_name
+        """
+        try:
+            conn = self.database_connection(database_name)
+            conn.execute("CREATE TABLE IF NOT EXISTS ingestion_manifest_t (file_name TEXT PRIMARY KEY, size INTEGER, "
+                         "mtime_ns INTEGER, content_hash TEXT, rows INTEGER, first_rowid INTEGER, last_rowid INTEGER, "
+                         "run_id TEXT, ingested_at TEXT)")
+            conn.row_factory = sqlite3.Row
+            manifest = {row['file_name']: dict(row) for row in conn.execute("SELECT * FROM ingestion_manifest_t")}
+            conn.close()
+            return manifest
+        except Exception as e:
+            self.logger.exception("Exception raised while Reading Ingestion Manifest: %s" % e)
+            raise e
+
+    def record_ingestion(self, conn, table_name, file, signature, rows, start_rowid):
+        """
+        * Method: record_ingestion
+        * Description: method to record an ingested file in the manifest. The rows of a previous version of the
+        *               file are deleted in the same transaction, so a modified file replaces its old rows.
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.5         Initial Creation
+        *
+        * Parameters:
+        *   conn: connection from bulk_connection
+        *   table_name
+        *   file
+        *   signature: Tuple of size, modification time and content hash of the original file
+        *   rows: number of rows inserted from the file
+        *   start_rowid: max rowid of the table before the file was inserted
+        """
+        previous = conn.execute("SELECT first_rowid, last_rowid FROM ingestion_manifest_t WHERE file_name = ?", (file,)).fetchone()
+        if previous is not None:
+            conn.execute("DELETE FROM " + table_name + " WHERE rowid BETWEEN ? AND ?", previous)
+        size, mtime_ns, content_hash = signature
+        conn.execute("INSERT OR REPLACE INTO ingestion_manifest_t VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now'))",
+                     (file, size, mtime_ns, content_hash, rows, start_rowid + 1, start_rowid + rows, self.run_id))
+        conn.commit()
+
+    def bulk_insert_file(self, conn, table_name, file, chunk_size = None, signature = None):
+        """
+        * Method: bulk_insert_file
+        * Description: method to stream one csv file into the table with parameterized batched inserts,
+        *               committing once per chunk. If the file fails, the rows already inserted from it
+        *               are deleted and the file is moved to the rejects folder.
+        :return: Number of rows inserted, None if the file was rejected
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.2         Initial Creation
+        * Ray       10/18/2026  1.5         Record the file in the ingestion manifest
+        *
+        * Parameters:
+        *   conn: connection from bulk_connection
+        *   table_name
+        *   file
+        *   chunk_size: rows per executemany/commit, defaults to Config.insert_chunk_size
+        *   signature: size, modification time and content hash recorded in the ingestion manifest, None to skip
+        """
+        chunk_size = chunk_size or self.config.insert_chunk_size
+        number_of_columns = len(conn.execute("PRAGMA table_info('" + table_name + "')").fetchall())
+        insert_sql = "INSERT INTO " + table_name + " values ({values})".format(values = ",".join(["?"] * number_of_columns))
+        # Rows of this file are the ones above the current max rowid, used to undo a partial file
+        start_rowid = conn.execute("SELECT IFNULL(MAX(rowid), 0) FROM " + table_name).fetchone()[0]
+        file_rows = 0
+        try:
+            with open(self.data_path + '/' + file, "r", newline = '') as f:
+                reader = csv.reader(f, delimiter = ',')
+                next(reader)
+                while True:
+                    chunk = list(islice(reader, chunk_size))
+                    if not chunk:
+                        break
+                    conn.executemany(insert_sql, chunk)
+                    conn.commit()
+                    file_rows += len(chunk)
+            if signature is not None:
+                self.record_ingestion(conn, table_name, file, signature, file_rows, start_rowid)
+            self.logger.info('%s: %d rows inserted' % (file, file_rows))
+            return file_rows
+        except Exception as e:
+            conn.rollback()
+            conn.execute("DELETE FROM " + table_name + " WHERE rowid > ?", (start_rowid,))
+            conn.commit()
+            self.logger.exception('Exception raised while Bulk Inserting Data into Table: %s' % e)
+            shutil.move(self.data_path + '/' + file, self.data_path + "_rejects")
+            return None
+
+    def bulk_insert_data(self, database_name, table_name, chunk_size = None, journal_mode = None, synchronous = None,
+                         files = None, signatures = None):
+        """
+        * Method: bulk_insert_data
+        * Description: method to insert data into table using parameterized batched inserts.
+        *               Rows are streamed from each file and committed once per chunk instead of once per row.
+        *               If a file fails, the rows already inserted from it are deleted and the file is rejected.
+        :return: Number of rows inserted
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.1         Initial Creation
+        * Ray       10/18/2026  1.2         Split into bulk_connection and bulk_insert_file
+        * Ray       10/18/2026  1.5         Insert a given list of files and record their signatures
+        *
+        * Parameters:
+        *   database_name
+        *   table_name
+        *   chunk_size: rows per executemany/commit, defaults to Config.insert_chunk_size
+        *   journal_mode: SQLite journal mode, defaults to Config.journal_mode
+        *   synchronous: SQLite synchronous setting, defaults to Config.synchronous
+        *   files: files to insert, defaults to every file in the data path
+        *   signatures: file name to signature recorded in the ingestion manifest
+        """
+        conn = self.bulk_connection(database_name, journal_mode, synchronous)
+        total_rows = 0
+        signatures = signatures or {}
+        self.logger.info('Start of Bulk Inserting Data into Table...')
+        try:
+            for file in (listdir(self.data_path) if files is None else files):
+                if not os.path.exists(self.data_path + '/' + file): # Rejected by validation
+                    continue
+                total_rows += self.bulk_insert_file(conn, table_name, file, chunk_size, signatures.get(file)) or 0
+        finally:
+            conn.close()
+        self.logger.info('End of Bulk Inserting Data into Table... %d rows inserted' % total_rows)
+        return total_rows
+
     def export_csv(self, database_name, table_name):
         """
         * Method: export_csv
@@ -147,6 +322,7 @@ class DatabaseOperation:
         * who       when        version     change (include bug = if apply)
         * -----     -------     -------     -------------------------------
         * Ray       03/29/2023  1.0         Initial Creation
+        * Ray       10/18/2026  1.3         Fetch and write Config.insert_chunk_size rows at a time
         *
         * Parameters:
         *   database_name
@@ -160,17 +336,183 @@ class DatabaseOperation:
             sqlSelect = "SELECT * FROM " + table_name + ""
             cursor = conn.cursor()
             cursor.execute(sqlSelect)
-            results = cursor.fetchall()
             # Get the headers of the csv file
             headers = [i[0] for i in cursor.description]
             # Make the CSV output directory
             if not os.path.isdir(self.file_from_db):
                 os.makedirs(self.file_from_db)
             # Open CSV file for writing
-            csv_file = csv.writer(open(self.file_from_db + self.file_name, 'w', newline = ''), delimiter = ',', lineterminator = '\r\n', quoting = csv.QUOTE_ALL, escapechar = '\\')
-            # Add the headers and data to the CSV file
-            csv_file.writerow(headers)
-            csv_file.writerows(results)
+            with open(self.file_from_db + self.file_name, 'w', newline = '') as f:
+                csv_file = csv.writer(f, delimiter = ',', lineterminator = '\r\n', quoting = csv.QUOTE_ALL, escapechar = '\\')
+                # Add the headers and data to the CSV file, one chunk of rows at a time
+                csv_file.writerow(headers)
+                results = cursor.fetchmany(self.config.insert_chunk_size)
+                while results:
+                    csv_file.writerows(results)
+                    results = cursor.fetchmany(self.config.insert_chunk_size)
+            conn.close()
             self.logger.info("End of Exporting Data into CSV...")
         except Exception as e:
-            self.logger.expcetion("Exception raised while Exporting Data into CSV: %s" % e)
\ No newline at end of file
+            self.logger.exception("Exception raised while Exporting Data into CSV: %s" % e)
+
+    def export_snapshot(self, database_name, table_name, column_names):
+        """
+        * Method: export_snapshot
+        * Description: method to export the table as a columnar snapshot in _validation/snapshot/, one .npy file
+        *               per column plus snapshot.json. Numeric columns are float64 with NaN for NULL, VARCHAR
+        *               columns are int32 category codes with -1 for NULL. The files are filled in chunks of
+        *               Config.insert_chunk_size rows and can be opened with np.load(mmap_mode = 'r').
+        :return: Number of rows exported
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.4         Initial Creation
+        *
+        * Parameters:
+        *   database_name
+        *   table_name
+        *   column_names: column names to SQL types, from the schema
+        """
+        target = self.data_path + '_validation/snapshot/'
+        staging = self.data_path + '_validation/snapshot.tmp/'
+        try:
+            self.logger.info("Start of Exporting Data into Snapshot...")
+            conn = self.database_connection(database_name)
+            rows = conn.execute("SELECT count(*) FROM " + table_name).fetchone()[0]
+            cursor = conn.execute("SELECT * FROM " + table_name)
+            headers = [i[0] for i in cursor.description]
+            categorical = [column_names.get(col, 'VARCHAR').upper() not in ('INTEGER', 'FLOAT') for col in headers]
+            if os.path.isdir(staging):
+                shutil.rmtree(staging)
+            os.makedirs(staging)
+            arrays = [np.lib.format.open_memmap(staging + col + '.npy', mode = 'w+', shape = (rows,),
+                                                dtype = np.int32 if is_categorical else np.float64)
+                      for col, is_categorical in zip(headers, categorical)]
+            categories = [{} for _ in headers] # Category to code of each VARCHAR column
+            start = 0
+            results = cursor.fetchmany(self.config.insert_chunk_size)
+            while results:
+                chunk = pd.DataFrame.from_records(results, columns = headers).replace('NULL', np.nan)
+                stop = start + len(chunk)
+                for j, col in enumerate(headers):
+                    if categorical[j]:
+                        values = chunk[col].astype(object)
+                        for category in values.dropna().unique():
+                            categories[j].setdefault(category, len(categories[j]))
+                        arrays[j][start:stop] = values.map(categories[j]).fillna(-1).to_numpy(dtype = np.int32)
+                    else:
+                        arrays[j][start:stop] = pd.to_numeric(chunk[col], errors = 'coerce').to_numpy(dtype = np.float64)
+                start = stop
+                results = cursor.fetchmany(self.config.insert_chunk_size)
+            conn.close()
+            for array in arrays:
+                array.flush()
+            del arrays
+            with open(staging + 'snapshot.json', 'w') as f:
+                json.dump({'rows': rows, 'columns': [{'name': col, 'type': column_names.get(col, 'VARCHAR'),
+                                                      'categories': list(categories[j]) if categorical[j] else None}
+                                                     for j, col in enumerate(headers)]}, f)
+            if os.path.isdir(target):
+                shutil.rmtree(target)
+            os.replace(staging, target)
+            self.logger.info("End of Exporting Data into Snapshot... %d rows exported" % rows)
+            return rows
+        except Exception as e:
+            self.logger.exception("Exception raised while Exporting Data into Snapshot: %s" % e)
+            raise e
+
+    def create_prediction_store(self, conn):
+        """
+        * Method: create_prediction_store
+        * Description: method to create the prediction result table. The table is clustered on (empid, model
+        *               version), so the predictions of one employee are found with one index seek.
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.6         Initial Creation
+        *
+        * Parameters:
+        *   conn
+        """
+        conn.execute("CREATE TABLE IF NOT EXISTS prediction_result_t (empid INTEGER NOT NULL, model_version TEXT NOT NULL, "
+                     "prediction INTEGER, run_id TEXT, predicted_at REAL, PRIMARY KEY (empid, model_version)) WITHOUT ROWID")
+
+    def upsert_predictions(self, conn, empids, predictions, model_version, chunk_size = None):
+        """
+        * Method: upsert_predictions
+        * Description: method to store predictions, replacing the previous prediction of the same empid and
+        *               model version, so a repeated run does not add duplicates. Rows are upserted with
+        *               executemany, one transaction per chunk. Rows without empid are skipped.
+        :return: Number of rows stored
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.6         Initial Creation
+        *
+        * Parameters:
+        *   conn: connection from bulk_connection
+        *   empids
+        *   predictions
+        *   model_version: version of the models that made the predictions
+        *   chunk_size: rows per executemany/commit, defaults to Config.insert_chunk_size
+        """
+        try:
+            self.create_prediction_store(conn)
+            empids = pd.to_numeric(pd.Series(empids), errors = 'coerce').to_numpy(dtype = np.float64)
+            known = ~np.isnan(empids)
+            if not known.all():
+                self.logger.warning('%d predictions without empid not stored' % (~known).sum())
+            predicted_at = time.time()
+            rows = zip(empids[known].astype(np.int64).tolist(), np.asarray(predictions)[known].astype(np.int64).tolist())
+            upsert_sql = ("INSERT INTO prediction_result_t VALUES (?, ?, ?, ?, ?) ON CONFLICT (empid, model_version) "
+                          "DO UPDATE SET prediction = excluded.prediction, run_id = excluded.run_id, "
+                          "predicted_at = excluded.predicted_at")
+            chunk_size = chunk_size or self.config.insert_chunk_size
+            stored = 0
+            while True:
+                chunk = [(empid, model_version, prediction, self.run_id, predicted_at)
+                         for empid, prediction in islice(rows, chunk_size)]
+                if not chunk:
+                    break
+                conn.executemany(upsert_sql, chunk)
+                conn.commit()
+                stored += len(chunk)
+            return stored
+        except Exception as e:
+            self.logger.exception("Exception raised while Storing Predictions: %s" % e)
+            raise e
+
+    def latest_prediction(self, database_name, empid, model_version = None):
+        """
+        * Method: latest_prediction
+        * Description: method to look up the latest stored prediction of an employee, of any model version or
+        *               of the given one, with an index seek on (empid, model version)
+        :return: Dictionary of the prediction, None if the employee has none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.6         Initial Creation
+        *
+        * Parameters:
+        *   database_name
+        *   empid
+        *   model_version: version of the models, None for the latest prediction
+        """
+        try:
+            conn = self.database_connection(database_name)
+            try:
+                conn.row_factory = sqlite3.Row
+                self.create_prediction_store(conn)
+                if model_version is None:
+                    row = conn.execute("SELECT * FROM prediction_result_t WHERE empid = ? ORDER BY predicted_at DESC LIMIT 1",
+                                       (empid,)).fetchone()
+                else:
+                    row = conn.execute("SELECT * FROM prediction_result_t WHERE empid = ? AND model_version = ?",
+                                       (empid, model_version)).fetchone()
+            finally:
+                conn.close()
+            return None if row is None else dict(row)
+        except Exception as e:
+            self.logger.exception("Exception raised while Looking up Prediction: %s" % e)
+            raise e
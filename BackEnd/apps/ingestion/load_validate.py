@@ -1,12 +1,52 @@
+import hashlib
 import json
+from concurrent.futures import ProcessPoolExecutor
 from os import listdir
 import shutil
 import pandas as pd
 from datetime import datetime
 import os
 from apps.database.database_operation import DatabaseOperation
+from apps.core.config import Config
 from apps.core.logger import Logger
 
+# LoadValidate instance of a pool worker process, built once by init_validation_worker
+worker_validator = None
+
+def init_validation_worker(run_id, data_path, mode):
+    """
+    * Method: init_validation_worker
+    * Description: method to build the LoadValidate instance used by a validation pool worker
+    :return: none
+    *
+    * who       when        version     change (include bug = if apply)
+    * -----     -------     -------     -------------------------------
+    * Ray       10/18/2026  1.3         Initial Creation
+    *
+    * Parameters:
+    *   run_id
+    *   data_path
+    *   mode
+    """
+    global worker_validator
+    worker_validator = LoadValidate(run_id, data_path, mode)
+
+def validate_file_worker(file, number_of_columns):
+    """
+    * Method: validate_file_worker
+    * Description: method to validate one file inside a validation pool worker
+    :return: Tuple of file name and True if the file is valid
+    *
+    * who       when        version     change (include bug = if apply)
+    * -----     -------     -------     -------------------------------
+    * Ray       10/18/2026  1.3         Initial Creation
+    *
+    * Parameters:
+    *   file
+    *   number_of_columns
+    """
+    return file, worker_validator.validate_file(file, number_of_columns)
+
 class LoadValidate:
     """
     *
@@ -20,6 +60,14 @@ class LoadValidate:
     * who       when        version     change (include bug = if apply)
     * -----     -------     -------     -------------------------------
     * Ray       03/29/2023  1.0         Initial Creation
+    * Ray       10/18/2026  1.1         Use bulk transactional insert
+    * Ray       10/18/2026  1.2         Single-pass streaming validation
+    * Ray       10/18/2026  1.3         Parallel multi-file ingestion
+    * Ray       10/18/2026  1.4         bug = export the prediction set read by the preprocessor
+    * Ray       10/18/2026  1.5         Export a columnar snapshot instead of InputFile.csv
+    * Ray       10/18/2026  1.6         Skip files already ingested with the same content
+    * Ray       10/18/2026  1.7         bug = insert the files in name order so the table rows are reproducible
+    * Ray       10/18/2026  1.8         Remove the per-check validation replaced by validate_file
     *
     *
     * Description: Class to load, validate, and transform the data
@@ -28,8 +76,10 @@ class LoadValidate:
     def __init__(self, run_id, data_path, mode):
         self.run_id = run_id
         self.data_path = data_path
+        self.mode = mode
         self.logger = Logger(self.run_id, 'LoadValidate', mode)
         self.dbOperation = DatabaseOperation(self.run_id, self.data_path, mode)
+        self.config = Config()
 
     def values_from_schema(self, schema_file):
         """
@@ -63,93 +113,200 @@ class LoadValidate:
             raise e
         return column_names, number_of_columns
 
-    def validate_column_length(self, number_of_columns):
+    def validate_file(self, file, number_of_columns, chunk_size = None):
+        """
+        * Method: validate_file
+        * Description: method to validate and transform one csv file in a single streaming pass.
+        *               The file is read once in chunks: the column count is checked on the first chunk,
+        *               non-null counts are accumulated per column and the NULL-filled rows are written to
+        *               a temporary file. A valid file is replaced by the transformed one, an invalid file
+        *               is moved to the rejects folder.
+        :return: True if the file is valid, False if it was rejected
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.2         Initial Creation
+        *
+        * Parameters:
+        *   file
+        *   number_of_columns
+        *   chunk_size: rows per chunk, defaults to Config.validation_chunk_size
+        """
+        chunk_size = chunk_size or self.config.validation_chunk_size
+        source = self.data_path + "/" + file
+        target = source + ".tmp"
+        reason = None
+        non_null_counts = None
+        try:
+            # Values are kept as text so the transformed file only differs by the NULL markers
+            with pd.read_csv(source, chunksize = chunk_size, dtype = str) as reader:
+                for chunk in reader:
+                    if non_null_counts is None:
+                        if chunk.shape[1] != number_of_columns:
+                            reason = "Invalid Column Lengths"
+                            break
+                        non_null_counts = chunk.count()
+                        chunk.fillna("NULL").to_csv(target, index = None, header = True, mode = "w")
+                    else:
+                        non_null_counts += chunk.count()
+                        chunk.fillna("NULL").to_csv(target, index = None, header = False, mode = "a")
+            if reason is None and (non_null_counts is None or (non_null_counts == 0).any()):
+                reason = "All Missing Values in Column"
+            if reason is None:
+                os.replace(target, source)
+                self.logger.info("%s: File Transformed Successfully!!" % file)
+                return True
+            if os.path.exists(target):
+                os.remove(target)
+            os.makedirs(self.data_path + "_rejects", exist_ok = True)
+            shutil.move(source, self.data_path + "_rejects")
+            self.logger.info("%s: %s" % (reason, file))
+            return False
+        except Exception as e:
+            if os.path.exists(target):
+                os.remove(target)
+            self.logger.exception("Exception raised while Validating File %s: %s" % (file, e))
+            raise e
+
+    def validate_files(self, number_of_columns, files = None):
         """
-        * Method: validate_column_length
-        * Description: method to validate the number of columns in the csv files
+        * Method: validate_files
+        * Description: method to validate column length and missing values, and replace missing values
+        *               with "NULL", reading every file in the data path only once
         :return: none
         *
         * who       when        version     change (include bug = if apply)
         * -----     -------     -------     -------------------------------
-        * Ray       03/29/2023  1.0         Initial Creation
+        * Ray       10/18/2026  1.2         Initial Creation
+        * Ray       10/18/2026  1.6         Validate a given list of files
         *
         * Parameters:
         *   number_of_columns
+        *   files: files to validate, defaults to every file in the data path
         """
         try:
-            self.logger.info("Start of Validating Column Length...")
-            for file in listdir(self.data_path):
-                csv = pd.read_csv(self.data_path + "/" + file)
-                if csv.shape[1] == number_of_columns:
-                    pass
-                else:
-                    shutil.move(self.data_path + "/" + file, self.data_path + "_rejects")
-                    self.logger.info("Invalid Column Lengths: %s" % file)
-            self.logger.info("End of Validation Column Length...")
+            self.logger.info("Start of Validating Files...")
+            for file in (listdir(self.data_path) if files is None else files):
+                self.validate_file(file, number_of_columns)
+            self.logger.info("End of Validating Files...")
         except OSError:
-            self.logger.exception("OSError raised while Validating Column Length")
+            self.logger.exception("OSError raised while Validating Files")
             raise OSError
         except Exception as e:
-            self.logger.exception("Exception raised while validating Column Length: %s" % e)
+            self.logger.exception("Exception raised while Validating Files: %s" % e)
             raise e
 
-    def validate_missing_values(self):
+    def file_signature(self, file, stat = None):
         """
-        * Method: validate_missing_values
-        * Description: method to validate if any column in the csv file has all values missing,
-        *               If all the values are missing, the file is not suitable for processing. It will be moved to bad file
-        :return: none
+        * Method: file_signature
+        * Description: method to compute the size, modification time and SHA-256 content hash of a file
+        :return: Tuple of size, modification time in nanoseconds and hex digest
         *
         * who       when        version     change (include bug = if apply)
         * -----     -------     -------     -------------------------------
-        * Ray       03/29/2023  1.0         Initial Creation
+        * Ray       10/18/2026  1.6         Initial Creation
         *
         * Parameters:
-        *   none
+        *   file
+        *   stat: os.stat result of the file, read if None
+        """
+        path = self.data_path + "/" + file
+        stat = stat or os.stat(path)
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return stat.st_size, stat.st_mtime_ns, digest.hexdigest()
+
+    def changed_files(self, database_name):
+        """
+        * Method: changed_files
+        * Description: method to find the files that are new or modified since they were last ingested.
+        *               A file with the size and modification time of its manifest entry is skipped without
+        *               reading it, otherwise it is skipped when its content hash is unchanged.
+        :return: Tuple of the files to ingest and their signatures
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.6         Initial Creation
+        *
+        * Parameters:
+        *   database_name
         """
         try:
-            self.logger.info("Start of Validating Missing Values...")
+            manifest = self.dbOperation.read_ingestion_manifest(database_name)
+            files = []
+            signatures = {}
             for file in listdir(self.data_path):
-                csv = pd.read_csv(self.data_path + "/" + file)
-                count = 0
-                for columns in csv:
-                    if (len(csv[columns]) - csv[columns].count()) == len(csv[columns]):
-                        count += 1
-                        shutil.move(self.data_path + "/" + file, self.data_path + "_rejects")
-                        self.logger.info("All Missing Values in Column: %s" % file)
-                        break
-            self.logger.info("End of Validating Missing Values...")
-        except OSError:
-            self.logger.exception("OSError raised while Validating Missing Values")
-            raise OSError
+                stat = os.stat(self.data_path + "/" + file)
+                entry = manifest.get(file)
+                if entry is not None and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                    self.logger.info("%s: unchanged since run %s, skipped" % (file, entry['run_id']))
+                    continue
+                signature = self.file_signature(file, stat)
+                if entry is not None and entry['size'] == signature[0] and entry['content_hash'] == signature[2]:
+                    self.logger.info("%s: same content as ingested by run %s, skipped" % (file, entry['run_id']))
+                    continue
+                files.append(file)
+                signatures[file] = signature
+            self.logger.info("%d new or modified files out of %d" % (len(files), len(listdir(self.data_path))))
+            return files, signatures
         except Exception as e:
-            self.logger.exception("Exception raised while Validing Missing Values: %s" % e)
+            self.logger.exception("Exception raised while Finding Changed Files: %s" % e)
             raise e
 
-    def replace_missing_values(self):
+    def ingest_files(self, number_of_columns, database_name, table_name, workers = None):
         """
-        * Method: replace_missing_values
-        * Description: method to replace missing values with "NULL"
-        :return: none
+        * Method: ingest_files
+        * Description: method to validate the files and insert the valid ones into the table.
+        *               With more than one worker and more than one file, files are validated in a process
+        *               pool and the valid files are inserted by this process only, so SQLite always has a
+        *               single writer. Files are inserted in name order whatever order their validation
+        *               completes in, so the row order, and the clustering and splits on it, are reproducible.
+        *               In training mode, files already ingested with the same content are skipped and the
+        *               ingested files are recorded in the ingestion manifest.
+        :return: Number of rows inserted
         *
         * who       when        version     change (include bug = if apply)
         * -----     -------     -------     -------------------------------
-        * Ray       03/29/2023  1.0         Initial Creation
+        * Ray       10/18/2026  1.3         Initial Creation
+        * Ray       10/18/2026  1.6         Incremental ingestion with the ingestion manifest
+        * Ray       10/18/2026  1.7         bug = insert in file name order instead of completion order
         *
         * Parameters:
-        *   none
+        *   number_of_columns
+        *   database_name
+        *   table_name
+        *   workers: number of worker processes, defaults to Config.ingestion_workers
         """
+        workers = workers or self.config.ingestion_workers
+        if self.mode == 'training':
+            files, signatures = self.changed_files(database_name)
+        else:
+            files, signatures = listdir(self.data_path), {}
+        files = sorted(files)
+        if workers <= 1 or len(files) <= 1:
+            self.validate_files(number_of_columns, files)
+            return self.dbOperation.bulk_insert_data(database_name, table_name, files = files, signatures = signatures)
         try:
-            self.logger.info("Start of Replacing Missing Values with NULL...")
-            only_files = [f for f in listdir(self.data_path)]
-            for file in only_files:
-                csv = pd.read_csv(self.data_path + "/" + file)
-                csv.fillna("NULL", inplace = True)
-                csv.to_csv(self.data_path + "/" + file, index = None, header = True)
-                self.logger.info("%s: File Transformed Successfully!!" % file)
-            self.logger.info("End of Replacing Missing Values with NULL...")
+            self.logger.info("Start of Parallel Ingestion of %d files with %d workers..." % (len(files), workers))
+            total_rows = 0
+            conn = self.dbOperation.bulk_connection(database_name)
+            try:
+                with ProcessPoolExecutor(max_workers = min(workers, len(files)), initializer = init_validation_worker,
+                                         initargs = (self.run_id, self.data_path, self.mode)) as executor:
+                    futures = [executor.submit(validate_file_worker, file, number_of_columns) for file in files]
+                    # Later files keep validating while the earlier ones are inserted
+                    for future in futures:
+                        file, is_valid = future.result()
+                        if is_valid:
+                            total_rows += self.dbOperation.bulk_insert_file(conn, table_name, file, signature = signatures.get(file)) or 0
+            finally:
+                conn.close()
+            self.logger.info("End of Parallel Ingestion... %d rows inserted" % total_rows)
+            return total_rows
         except Exception as e:
-            self.logger.exception("Exception raised while Replacing Missing Values with NULL: %s", % e)
+            self.logger.exception("Exception raised while Parallel Ingestion: %s" % e)
             raise e
 
     def archive_old_files(self):
@@ -265,6 +422,7 @@ class LoadValidate:
         * who       when        version     change (include bug = if apply)
         * -----     -------     -------     -------------------------------
         * Ray       03/29/2023  1.0         Initial Creation
+        * Ray       10/18/2026  1.5         Export the columnar snapshot
         *
         * Parameters:
         *   none
@@ -275,18 +433,12 @@ class LoadValidate:
             self.archive_old_files()
             # Extracting Values from Training Schema
             column_names, number_of_columns = self.values_from_schema('schema_train')
-            # Validating Column Length in the File
-            self.validate_column_length(number_of_columns)
-            # Validating if any column has all values missing
-            self.validate_missing_values()
-            # Replacing Blanks in the csv file with "NULL" values
-            self.replace_missing_values()
             # Create Database with given name, if present open the connection. Create table with columns given in schema
             self.dbOperation.create_table('training', 'training_raw_data_t', column_names)
-            # Insert CSV files in the table
-            self.dbOperation.insert_data('training', 'training_raw_data_t')
-            # Export Data in table to csv file
-            self.dbOperation.export_csv('training', 'training_raw_data_t')
+            # Validating Column Length and missing values, replacing Blanks with "NULL" and inserting CSV files in the table
+            self.ingest_files(number_of_columns, 'training', 'training_raw_data_t')
+            # Export Data in table to the columnar snapshot
+            self.dbOperation.export_snapshot('training', 'training_raw_data_t', column_names)
             # Move Processed Files
             self.move_processed_files()
             self.logger.info("End of Data Load, Validation and Transformation")
@@ -303,6 +455,7 @@ class LoadValidate:
         * who       when        version     change (include bug = if apply)
         * -----     -------     -------     -------------------------------
         * Ray       03/29/2023  1.0         Initial Creation
+        * Ray       10/18/2026  1.5         Export the columnar snapshot
         *
         * Parameters:
         *   none
@@ -313,17 +466,13 @@ class LoadValidate:
             self.archive_old_files()
             # Extracting values from schema
             column_names, number_of_columns = self.values_from_schema('schema_predict')
-            # Validating Column Length in the file
-            self.validate_column_length(number_of_columns)
-            # Validating if any column has all values missing
-            self.validate_missing_values()
-            # Replacing blanks in the csv file with "NULL" values
-            self.replace_missing_values()
             # Create database with given name. If present open the connection. Create table with columns given in schema
             self.dbOperation.create_table('prediction', 'prediction_raw_data_t', column_names)
-            # Insert CSV files in the table
-            self.dbOperation.insert_data('prediction', 'prediction_raw_data_t')
-            # Export data in table to csv file
+            # Validating column length and missing values, replacing blanks with "NULL" and inserting CSV files in the table
+            self.ingest_files(number_of_columns, 'prediction', 'prediction_raw_data_t')
+            # Export data in table to the columnar snapshot
+            self.dbOperation.export_snapshot('prediction', 'prediction_raw_data_t', column_names)
+            # Move processed files
             self.move_processed_files()
             self.logger.info("End of Data Load, Validation, and Transformation")
         except Exception:
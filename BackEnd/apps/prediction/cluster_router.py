@@ -0,0 +1,69 @@
+import numpy as np
+
+class ClusterRouter:
+    """
+    *
+    * filename: cluster_router.py
+    * version: 1.0
+    * author: Ray Joshi
+    * Creation date: 10/18/2026
+    *
+    * Change History:
+    *
+    * who       when        version     change (include bug = if apply)
+    * -----     -------     -------     -------------------------------
+    * Ray       10/18/2026  1.0         Initial Creation
+    * Ray       10/18/2026  1.1         Verify with the feature names of the training data
+    *
+    *
+    * Description: Class to route rows to their nearest KMeans centroid. The centroids are extracted at training
+    *               into one float64 array with their squared norms, and a block of rows is routed with one matrix
+    *               product: ||c||^2 - 2 x.c is the squared distance less ||x||^2, which does not change the
+    *               nearest centroid. It is the distance KMeans.predict minimizes, without its input validation.
+    """
+
+    def __init__(self, kmeans, chunk_size = 10000):
+        self.centers = np.ascontiguousarray(kmeans.cluster_centers_, dtype = np.float64)
+        self.center_norms = np.einsum('ij,ij->i', self.centers, self.centers)
+        self.chunk_size = chunk_size
+
+    def predict(self, features):
+        """
+        * Method: predict
+        * Description: method to get the cluster of each row, in blocks of chunk_size rows
+        :return: Array of cluster numbers
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   features: 2-D array in training column order, or one row
+        """
+        features = np.asarray(features, dtype = np.float64)
+        if features.ndim == 1:
+            features = features.reshape(1, -1)
+        clusters = np.empty(len(features), dtype = np.int32)
+        for start in range(0, len(features), self.chunk_size):
+            block = features[start:start + self.chunk_size]
+            distances = self.center_norms - 2 * (block @ self.centers.T)
+            clusters[start:start + len(block)] = distances.argmin(axis = 1)
+        return clusters
+
+    def verify(self, kmeans, features):
+        """
+        * Method: verify
+        * Description: method to count the rows routed differently from KMeans.predict. KMeans gets the features
+        *               as given, so a DataFrame keeps the feature names it was fitted with.
+        :return: Number of mismatching rows
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        * Ray       10/18/2026  1.1         Features given to KMeans unchanged
+        *
+        * Parameters:
+        *   kmeans: fitted KMeans model the router was extracted from
+        *   features: 2-D array or DataFrame in training column order
+        """
+        return int((self.predict(features) != kmeans.predict(features)).sum())
@@ -0,0 +1,223 @@
+import json
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from xgboost import XGBClassifier
+
+class CompiledModel:
+    """
+    *
+    * filename: compiled_model.py
+    * version: 1.0
+    * author: Ray Joshi
+    * Creation date: 10/18/2026
+    *
+    * Change History:
+    *
+    * who       when        version     change (include bug = if apply)
+    * -----     -------     -------     -------------------------------
+    * Ray       10/18/2026  1.0         Initial Creation
+    * Ray       10/18/2026  1.1         bug = XGBoost releases without the JSON model are not compiled
+    * Ray       10/18/2026  1.2         Verify with the feature names of the training data
+    *
+    *
+    * Description: Class to score a trained RandomForest or XGBoost classifier from flat NumPy arrays.
+    *               The nodes of every tree are concatenated into feature, threshold, children and leaf value
+    *               arrays, and all trees are traversed at once for a block of rows, one tree level per step,
+    *               without the input validation and conversion of the library predict. Only the (row, tree)
+    *               pairs that have not reached a leaf are stepped, leaves point to themselves.
+    *               Comparisons follow the libraries: features are cast to float32, sklearn goes left when
+    *               value <= threshold and XGBoost when value < threshold, or to the default side for a NaN.
+    """
+
+    def __init__(self, model, chunk_size = 10000):
+        self.chunk_size = chunk_size
+        if isinstance(model, RandomForestClassifier):
+            self.compile_forest(model)
+        elif isinstance(model, XGBClassifier):
+            self.compile_boosting(model)
+        else:
+            raise ValueError('No compiled engine for %s' % type(model).__name__)
+
+    def link(self, trees):
+        """
+        * Method: link
+        * Description: method to concatenate the trees into the flat node arrays, offsetting the children
+        *               of each tree by its first node and pointing leaves to themselves
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   trees: list of (feature, threshold, left, right, default left) arrays of each tree, -1 children at leaves
+        """
+        sizes = np.array([len(tree[0]) for tree in trees])
+        self.roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+        feature, threshold, left, right, default_left = [np.concatenate(arrays) for arrays in zip(*trees)]
+        nodes = np.arange(len(feature))
+        leaf = left < 0
+        offsets = np.repeat(self.roots, sizes)
+        self.feature = np.where(leaf, 0, feature).astype(np.int64)
+        self.threshold = np.where(leaf, np.inf, threshold).astype(np.float64)
+        self.left = np.where(leaf, nodes, left + offsets).astype(np.int64)
+        self.right = np.where(leaf, nodes, right + offsets).astype(np.int64)
+        self.default_left = default_left.astype(bool)
+
+    def compile_forest(self, model):
+        """
+        * Method: compile_forest
+        * Description: method to compile a RandomForestClassifier. sklearn compares the float32 feature with
+        *               a float64 threshold using <=, which is < on the next float64 above the threshold.
+        *               Leaves hold the class probabilities of the tree.
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   model: fitted RandomForestClassifier
+        """
+        if model.n_outputs_ != 1:
+            raise ValueError('No compiled engine for multi-output forests')
+        self.kind = 'forest'
+        self.classes = np.asarray(model.classes_)
+        trees, values = [], []
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            trees.append((tree.feature, np.nextafter(tree.threshold, np.inf), tree.children_left, tree.children_right,
+                          np.zeros(tree.node_count, dtype = bool)))
+            value = tree.value[:, 0, :len(self.classes)]
+            values.append(value / value.sum(axis = 1, keepdims = True))
+        self.link(trees)
+        self.value = np.concatenate(values).astype(np.float64)
+        self.n_trees = len(trees)
+
+    def compile_boosting(self, model):
+        """
+        * Method: compile_boosting
+        * Description: method to compile a binary:logistic XGBClassifier from its JSON model. Leaves hold the
+        *               float32 leaf weights, summed from the base margin in tree order as XGBoost does.
+        *               XGBoost releases before 1.3 cannot save the model as JSON and are not compiled.
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        * Ray       10/18/2026  1.1         bug = ValueError when the JSON model is not available
+        *
+        * Parameters:
+        *   model: fitted XGBClassifier
+        """
+        try:
+            learner = json.loads(model.get_booster().save_raw('json'))['learner']
+        except TypeError:
+            raise ValueError('No compiled engine for XGBoost releases without the JSON model format')
+        booster = learner['gradient_booster']
+        if learner['objective']['name'] != 'binary:logistic' or booster['name'] != 'gbtree':
+            raise ValueError('No compiled engine for %s %s' % (booster['name'], learner['objective']['name']))
+        try:
+            if model.best_iteration is not None:
+                raise ValueError('No compiled engine for early stopped boosters')
+        except AttributeError:
+            pass
+        self.kind = 'boosting'
+        self.classes = np.asarray(model.classes_)
+        trees, values = [], []
+        for tree in booster['model']['trees']:
+            # split_type is absent from the JSON model of releases without categorical splits
+            if any(tree.get('split_type', [])):
+                raise ValueError('No compiled engine for categorical splits')
+            left = np.array(tree['left_children'])
+            # Split conditions are float32 and hold the leaf weight at leaves
+            conditions = np.array(tree['split_conditions'], dtype = np.float32)
+            trees.append((np.array(tree['split_indices']), conditions.astype(np.float64), left,
+                          np.array(tree['right_children']), np.array(tree['default_left'])))
+            values.append(np.where(left < 0, conditions, np.float32(0)))
+        self.link(trees)
+        self.value = np.concatenate(values).astype(np.float32)
+        self.n_trees = len(trees)
+        base_score = np.float32(str(learner['learner_model_param']['base_score']).strip('[]'))
+        self.base_margin = np.float32(-np.log(np.float32(1) / base_score - np.float32(1)))
+
+    def leaves(self, features):
+        """
+        * Method: leaves
+        * Description: method to find the leaf of every tree for a block of rows
+        :return: 2-D array of leaf node indices, one column per tree
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   features: 2-D float32 array
+        """
+        # One entry per (row, tree) pair, only the pairs not yet at a leaf are stepped
+        nodes = np.tile(self.roots, len(features))
+        rows = np.repeat(np.arange(len(features)), len(self.roots))
+        active = np.flatnonzero(self.left[nodes] != nodes)
+        missing = self.kind == 'boosting' and np.isnan(features).any()
+        while len(active):
+            current = nodes[active]
+            values = features[rows[active], self.feature[current]]
+            go_left = values < self.threshold[current]
+            if missing:
+                go_left |= np.isnan(values) & self.default_left[current]
+            current = np.where(go_left, self.left[current], self.right[current])
+            nodes[active] = current
+            active = active[self.left[current] != current]
+        return nodes.reshape(len(features), len(self.roots))
+
+    def predict(self, features):
+        """
+        * Method: predict
+        * Description: method to predict the classes of the rows, in blocks of chunk_size rows
+        :return: Array of predicted classes
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   features: 2-D array in training column order
+        """
+        features = np.asarray(features, dtype = np.float32)
+        if features.ndim == 1:
+            features = features.reshape(1, -1)
+        if self.kind == 'forest' and np.isnan(features).any():
+            raise ValueError('Input contains NaN')
+        predictions = np.empty(len(features), dtype = self.classes.dtype)
+        for start in range(0, len(features), self.chunk_size):
+            nodes = self.leaves(features[start:start + self.chunk_size])
+            if self.kind == 'forest':
+                probabilities = self.value[nodes].sum(axis = 1) / self.n_trees
+                predictions[start:start + len(nodes)] = self.classes[probabilities.argmax(axis = 1)]
+            else:
+                # accumulate adds in tree order, unlike the pairwise sum, so float32 rounding matches XGBoost
+                margins = np.empty((len(nodes), self.n_trees + 1), dtype = np.float32)
+                margins[:, 0] = self.base_margin
+                margins[:, 1:] = self.value[nodes]
+                margin = np.add.accumulate(margins, axis = 1)[:, -1]
+                probability = np.float32(1) / (np.float32(1) + np.exp(-margin))
+                predictions[start:start + len(nodes)] = self.classes[(probability > 0.5).astype(np.int64)]
+        return predictions
+
+    def verify(self, model, features):
+        """
+        * Method: verify
+        * Description: method to count the rows predicted differently from the model the engine was compiled from.
+        *               The model gets the features as given, so a DataFrame keeps the feature names it was fitted with.
+        :return: Number of mismatching rows
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        * Ray       10/18/2026  1.2         Features given to the model unchanged
+        *
+        * Parameters:
+        *   model: fitted model
+        *   features: 2-D array or DataFrame in training column order
+        """
+        return int((self.predict(features) != model.predict(features)).sum())
@@ -0,0 +1,174 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from apps.core.config import Config
+from apps.core.logger import Logger
+from apps.core.metrics import Metrics
+from apps.prediction.predict_model import PredictionModel
+
+class MicroBatcher:
+    """
+    *
+    * filename: micro_batcher.py
+    * version: 1.0
+    * author: Ray Joshi
+    * Creation date: 10/18/2026
+    *
+    * Change History:
+    *
+    * who       when        version     change (include bug = if apply)
+    * -----     -------     -------     -------------------------------
+    * Ray       10/18/2026  1.0         Initial Creation
+    * Ray       10/18/2026  1.1         Batch scoring latency histogram
+    * Ray       10/18/2026  1.2         bug = a bad record fails only its own request
+    *
+    *
+    * Description: Class to coalesce concurrent single-employee predictions. Requests arriving within
+    *               Config.batch_window seconds of the first one are scored together in one vectorized
+    *               KMeans and cluster-model call, and each caller gets its own prediction back.
+    *               When a batch fails, its records are scored one by one, so a bad record only fails its own caller.
+    """
+
+    def __init__(self, run_id, data_path, window = None, max_batch_size = None):
+        self.run_id = run_id
+        self.data_path = data_path
+        config = Config()
+        self.window = config.batch_window if window is None else window
+        self.max_batch_size = max_batch_size or config.batch_max_size
+        self.logger = Logger(self.run_id, 'MicroBatcher', 'prediction')
+        self.predictionModel = PredictionModel(self.run_id, self.data_path)
+        self.requests = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        """
+        * Method: start
+        * Description: method to start the batching thread. It is started on first use, so a server can
+        *               fork its workers before any thread exists.
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   none
+        """
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target = self.run, name = 'MicroBatcher', daemon = True)
+                self.thread.start()
+
+    def submit(self, record):
+        """
+        * Method: submit
+        * Description: method to queue one employee record for prediction
+        :return: Future resolved with the prediction
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        * Ray       10/18/2026  1.2         bug = reject a record that is not a dictionary before it is queued
+        *
+        * Parameters:
+        *   record: dictionary with the prediction schema columns
+        """
+        future = Future()
+        if not isinstance(record, dict):
+            future.set_exception(TypeError('Employee record must be a dictionary, not %s' % type(record).__name__))
+            return future
+        self.start()
+        self.requests.put((record, future))
+        return future
+
+    def predict(self, record, timeout = None):
+        """
+        * Method: predict
+        * Description: method to predict one employee record through the batcher
+        :return: Prediction
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   record: dictionary with the prediction schema columns
+        *   timeout: seconds to wait for the prediction
+        """
+        return self.submit(record).result(timeout)
+
+    def collect(self):
+        """
+        * Method: collect
+        * Description: method to wait for a request and gather the ones arriving within the batch window
+        :return: List of (record, future)
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   none
+        """
+        batch = [self.requests.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self.requests.get(timeout = remaining) if remaining > 0 else self.requests.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        """
+        * Method: run
+        * Description: method run by the batching thread to score batches until the process exits
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        * Ray       10/18/2026  1.1         Observe the scoring time of each batch
+        * Ray       10/18/2026  1.2         bug = score the records of a failed batch one by one
+        *
+        * Parameters:
+        *   none
+        """
+        while True:
+            batch = self.collect()
+            try:
+                start = time.perf_counter()
+                predictions = self.predictionModel.predict_records([record for record, _ in batch])
+                Metrics.observe('predict_batch', time.perf_counter() - start)
+                for (_, future), prediction in zip(batch, predictions):
+                    future.set_result(int(prediction))
+            except Exception as e:
+                self.logger.exception('Exception raised while Scoring Batch of %d: %s' % (len(batch), e))
+                if len(batch) > 1:
+                    self.score_each(batch)
+                else:
+                    batch[0][1].set_exception(e)
+
+    def score_each(self, batch):
+        """
+        * Method: score_each
+        * Description: method to score the records of a failed batch one by one, so only the requests with
+        *               a bad record get its exception
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.2         Initial Creation
+        *
+        * Parameters:
+        *   batch: list of (record, future)
+        """
+        for record, future in batch:
+            try:
+                future.set_result(int(self.predictionModel.predict_records([record])[0]))
+            except Exception as e:
+                self.logger.info('Record rejected from Batch: %s' % e)
+                future.set_exception(e)
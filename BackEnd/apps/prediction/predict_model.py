@@ -1,8 +1,15 @@
+import os
+import numpy as np
 import pandas as pd
+from apps.core.config import Config
 from apps.core.logger import Logger
 from apps.ingestion.load_validate import LoadValidate
 from apps.preprocess.preprocessor import Preprocessor
 from apps.core.file_operation import FileOperation
+from apps.core.metrics import Metrics
+from apps.core.model_registry import ModelRegistry
+from apps.prediction.cluster_router import ClusterRouter
+from apps.database.database_operation import DatabaseOperation
 
 class PredictionModel:
     """
@@ -17,6 +24,19 @@ class PredictionModel:
     * who       when        version     change (include bug = if apply)
     * -----     -------     -------     -------------------------------
     * Ray       03/29/2023  1.0         Initial Creation
+    * Ray       10/18/2026  1.1         Use resident models from ModelRegistry
+    * Ray       10/18/2026  1.2         Vectorized scoring in input order
+    * Ray       10/18/2026  1.3         Features from the fitted preprocessing pipeline
+    * Ray       10/18/2026  1.4         Scoring of a list of records for the micro-batcher
+    * Ray       10/18/2026  1.5         Streaming batch prediction in chunks
+    * Ray       10/18/2026  1.6         Per-stage timing and resource metrics
+    * Ray       10/18/2026  1.7         Compiled tree engine for small blocks
+    * Ray       10/18/2026  1.8         Nearest-centroid cluster routing
+    * Ray       10/18/2026  1.9         Store batch predictions in the prediction database
+    * Ray       10/18/2026  1.10        bug = ignore the feature names warning only around the model calls
+    * Ray       10/18/2026  1.11        bug = release the log file when a batch prediction run ends
+    * Ray       10/18/2026  1.12        bug = score the library models on DataFrames with the feature names
+    * Ray       10/18/2026  1.13        bug = one model registry snapshot per request or batch
     *
     *
     * Description: Class to predict the result
@@ -28,48 +48,131 @@ class PredictionModel:
         self.loadValidate = LoadValidate(self.run_id, self.data_path, 'prediction')
         self.preProcess = Preprocessor(self.run_id, self.data_path, 'prediction')
         self.fileOperation = FileOperation(self.run_id, self.data_path, 'prediction')
+        self.modelRegistry = ModelRegistry(self.run_id, self.data_path, 'prediction')
+        self.metrics = Metrics(self.run_id, 'prediction')
+        self.dbOperation = DatabaseOperation(self.run_id, self.data_path, 'prediction')
+        self.compiled_max_rows = Config().compiled_max_rows
 
-    def batch_predict_from_model(self):
+    def predict_array(self, features, models):
+        """
+        * Method: predict_array
+        * Description: method to score a feature array. Rows are routed with the cluster router, or the KMeans
+        *               model of a training without one, the row indices of each cluster are computed once,
+        *               each cluster model predicts on its contiguous block and the predictions are scattered
+        *               back into one output array in input order. Blocks of up to Config.compiled_max_rows rows
+        *               are scored by the compiled model of the cluster.
+        *               The library models are fitted on DataFrames, so they are scored on DataFrames with the
+        *               feature columns of the pipeline. The compiled models and the cluster router take the array.
+        :return: Array of predictions in input order
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.2         Initial Creation
+        * Ray       10/18/2026  1.7         Compiled tree engine for small blocks
+        * Ray       10/18/2026  1.8         Nearest-centroid cluster router
+        * Ray       10/18/2026  1.10        bug = scope the feature names warning filter to the model calls
+        * Ray       10/18/2026  1.12        bug = feature names in place of the process-wide warning filter
+        * Ray       10/18/2026  1.13        bug = models of the snapshot taken by the caller
+        *
+        * Parameters:
+        *   features: 2-D float array in training column order
+        *   models: ModelSnapshot of the request or batch
+        """
+        router, cluster_models, compiled_models = models.router, models.cluster_models, models.compiled_models
+        columns = models.pipeline.feature_columns
+        # The KMeans model of a training without router was fitted with the feature names as well
+        clusters = router.predict(features if isinstance(router, ClusterRouter) else pd.DataFrame(features, columns = columns))
+        predictions = np.empty(len(features), dtype = np.int64)
+        # Stable sort groups the rows of each cluster together, keeping input order inside a cluster
+        order = np.argsort(clusters, kind = 'stable')
+        cluster_numbers, starts = np.unique(clusters[order], return_index = True)
+        for cluster, rows in zip(cluster_numbers, np.split(order, starts[1:])):
+            # The compiled engine skips the library overhead that dominates small blocks
+            if len(rows) <= self.compiled_max_rows and int(cluster) in compiled_models:
+                predictions[rows] = compiled_models[int(cluster)].predict(features[rows])
+            else:
+                predictions[rows] = cluster_models[int(cluster)].predict(pd.DataFrame(features[rows], columns = columns))
+        return predictions
+
+    def predict_records(self, records):
+        """
+        * Method: predict_records
+        * Description: method to score a list of employee records in one vectorized call, with one snapshot of
+        *               the models
+        :return: Array of predictions in record order
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.4         Initial Creation
+        * Ray       10/18/2026  1.13        One model registry snapshot for the records
+        *
+        * Parameters:
+        *   records: list of dictionaries with the prediction schema columns
+        """
+        models = self.modelRegistry.get_snapshot()
+        empids, features = self.preProcess.preprocess_predict(pd.DataFrame.from_records(records), models)
+        return self.predict_array(features, models)
+
+    def batch_predict_from_model(self, chunk_size = None):
         """
         * Method: batch_predict_from_model
-        * Description: method to prediction the results
+        * Description: method to prediction the results. The prediction set is preprocessed and scored one chunk
+        *               at a time and the results are appended to a temporary file, so peak memory depends on
+        *               the chunk size and not on the file size. The file replaces Predictions.csv at the end.
+        *               Each chunk is also upserted into the prediction result table, keyed by empid and model
+        *               version, for lookups by empid. The whole set is scored with one snapshot of the models,
+        *               so a reload during the batch does not change the version of its predictions.
         :return: none
         *
         * who       when        version     change (include bug = if apply)
         * -----     -------     -------     -------------------------------
         * Ray       03/29/2023  1.0         Initial Creation
+        * Ray       10/18/2026  1.2         Score with predict_array
+        * Ray       10/18/2026  1.3         Features from the fitted preprocessing pipeline
+        * Ray       10/18/2026  1.5         Stream the prediction set in chunks
+        * Ray       10/18/2026  1.6         Record the metrics of each stage
+        * Ray       10/18/2026  1.9         Upsert the predictions into the prediction result table
+        * Ray       10/18/2026  1.11        Close the log file of the run
+        * Ray       10/18/2026  1.13        One model registry snapshot for the batch
         *
         * Parameters:
-        *   none
+        *   chunk_size: rows per chunk, defaults to Config.prediction_chunk_size
         """
         try:
             self.logger.info("Start of Prediction")
             self.logger.info('run_id: ' + str(self.run_id))
             # Validation and Transformation
-            self.loadValidate.validate_predictset()
-            # Preprocessing activities
-            self.X = self.preProcess.preprocess_predictset()
-            # Load Model
-            kmeans = self.fileOperation.load_model('KMeans')
-            # Cluster selection
-            clusters = kmeans.predict(self.X.drop(['empid'], axis = 1))
-            self.X['clusters'] = clusters
-            clusters = self.X['clusters'].unique()
-            y_predicted = []
-
-            for i in clusters:
-                self.logger.info("Clusters loop started")
-                cluster_data = self.X[self.X['clusters'] == i]
-                cluster_data_new = cluster_data.drop(['empid', 'clusters'], axis = 1)
-                model_name = self.fileOperation.correct_model(i)
-                model = self.fileOperation.load_model(model_name)
-                y_predicted = model.predict(cluster_data_new)
-                result = pd.DataFrame({"Empid": cluster_data['empid'], "Prediction": y_predicted})
-                result.to_csv(self.data_path + "_results/" + "Predictions.csv", header = True, mode = "a+", index = False)
+            with self.metrics.stage('validation'):
+                self.loadValidate.validate_predictset()
+            if not os.path.isdir(self.data_path + "_results/"):
+                os.makedirs(self.data_path + "_results/")
+            result_file = self.data_path + "_results/" + "Predictions.csv"
+            pd.DataFrame(columns = ["Empid", "Prediction"]).to_csv(result_file + ".tmp", header = True, mode = "w", index = False)
+            rows = 0
+            models = self.modelRegistry.get_snapshot()
+            conn = self.dbOperation.bulk_connection('prediction')
+            try:
+                with self.metrics.stage('scoring') as stage:
+                    # Preprocessing activities, one chunk at a time
+                    for empids, features in self.preProcess.preprocess_predictset(models, chunk_size):
+                        # Cluster selection and prediction in input order
+                        y_predicted = self.predict_array(features, models)
+                        # Appending the results of the chunk
+                        pd.DataFrame({"Empid": empids, "Prediction": y_predicted}).to_csv(result_file + ".tmp", header = False, mode = "a", index = False)
+                        self.dbOperation.upsert_predictions(conn, empids, y_predicted, models.version)
+                        rows += len(empids)
+                    stage['rows'] = rows
+            finally:
+                conn.close()
+            os.replace(result_file + ".tmp", result_file)
+            self.logger.info("%d rows predicted" % rows)
             self.logger.info("End of Prediction")
         except Exception:
             self.logger.exception("Unsuccessful End of Prediction")
             raise Exception
+        finally:
+            # The prediction run is over, release its log file
+            Logger.close(self.run_id, 'prediction')
 
     def single_predict_from_model(self, data):
         """
@@ -80,6 +183,9 @@ class PredictionModel:
         * who       when        version     change (include bug = if apply)
         * -----     -------     -------     -------------------------------
         * Ray       03/29/2023  1.0         Initial Creation
+        * Ray       10/18/2026  1.2         Score with predict_array
+        * Ray       10/18/2026  1.3         Features from the fitted preprocessing pipeline
+        * Ray       10/18/2026  1.13        One model registry snapshot for the prediction
         *
         * Parameters:
         *   data
@@ -87,52 +193,14 @@ class PredictionModel:
         try:
             self.logger.info("Start of Prediction")
             self.logger.info("run_id: " + str(self.run_id))
+            models = self.modelRegistry.get_snapshot()
             # Preprocessing activities
-            self.X = self.preProcess.preprocess_predict(data)
-            # Load Model
-            kmeans = self.fileOperation.load_model('KMeans')
-            # Cluster selection
-            clusters = kmeans.predict(self.X.drop(['empid'], axis = 1))
-            self.X['clusters'] = clusters
-            clusters = self.X['clusters'].unique()
-            y_predicted = []
-            for i in clusters:
-                self.logger.info("Clusters loop started")
-                cluster_data = self.X[self.X['clusters'] == i]
-                cluster_data_new = cluster_data.drop(['empid', 'clusters'], axis = 1)
-                model_name = self.fileOperation.correct_model(i)
-                model = self.fileOperation.load_model(model_name)
-                self.logger.info("Shape of Data " + str(cluster_data_new.shape))
-                self.logger.info("Shape of Data " + str(cluster_data_new.info()))
-                y_predicted = model.predict(cluster_data_new)
-                self.logger.info("Output: " + str(y_predicted))
-                self.logger.info("End of Prediction")
-                return int(y_predicted[0])
+            empids, features = self.preProcess.preprocess_predict(data, models)
+            # Cluster selection and prediction
+            y_predicted = self.predict_array(features, models)
+            self.logger.info("Output: " + str(y_predicted))
+            self.logger.info("End of Prediction")
+            return int(y_predicted[0])
         except Exception:
             self.logger.exception("Unsuccessful End of Prediction")
             raise Exception
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+class CategoricalEncoder:
+    """
+    *
+    * filename: categorical_encoder.py
+    * version: 1.0
+    * author: Ray Joshi
+    * Creation date: 10/18/2026
+    *
+    * Change History:
+    *
+    * who       when        version     change (include bug = if apply)
+    * -----     -------     -------     -------------------------------
+    * Ray       10/18/2026  1.0         Initial Creation
+    *
+    *
+    * Description: Class to one-hot encode categorical columns with a fixed category vocabulary, declared in the
+    *               schema JSON or learned at training. Values are mapped to integer codes and every one-hot
+    *               block is filled with a single NumPy assignment, so the output columns never depend on the
+    *               categories present in the batch. Like pd.get_dummies(drop_first = True), the first category
+    *               of each column is dropped, and missing or unknown values encode as all zeros.
+    """
+
+    def __init__(self, vocabulary = None, drop_first = True):
+        self.vocabulary = {col: list(categories) for col, categories in (vocabulary or {}).items()}
+        self.drop_first = drop_first
+
+    def fit(self, data):
+        """
+        * Method: fit
+        * Description: method to learn the sorted categories of the object columns without a declared vocabulary
+        :return: The fitted encoder
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   data: DataFrame with the raw columns
+        """
+        for col in data.select_dtypes(include = ['object']).columns:
+            if col not in self.vocabulary:
+                self.vocabulary[col] = sorted(data[col].dropna().unique())
+        self.vocabulary = {col: categories for col, categories in self.vocabulary.items() if col in data.columns}
+        return self
+
+    def codes(self, data, col):
+        """
+        * Method: codes
+        * Description: method to map the values of a column to their vocabulary index, -1 if missing or unknown
+        :return: Integer array
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   data: DataFrame with the raw columns
+        *   col: categorical column
+        """
+        return pd.Categorical(data[col], categories = self.vocabulary[col]).codes
+
+    def feature_names(self):
+        """
+        * Method: feature_names
+        * Description: method to get the one-hot column names, column + '_' + category like pd.get_dummies
+        :return: List of column names
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   none
+        """
+        skip = 1 if self.drop_first else 0
+        return [col + '_' + str(category) for col, categories in self.vocabulary.items() for category in categories[skip:]]
+
+    def transform(self, data, sparse_output = False):
+        """
+        * Method: transform
+        * Description: method to build the one-hot columns of every categorical column at once
+        :return: DataFrame of uint8 one-hot columns, with sparse columns if sparse_output
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   data: DataFrame with the raw columns
+        *   sparse_output: build a SciPy sparse matrix instead of a dense array, for wide categoricals
+        """
+        skip = 1 if self.drop_first else 0
+        rows, cols = [], []
+        offset = 0
+        for col, categories in self.vocabulary.items():
+            codes = self.codes(data, col)
+            present = np.flatnonzero(codes >= skip)
+            rows.append(present)
+            cols.append(codes[present] - skip + offset)
+            offset += len(categories) - skip
+        rows = np.concatenate(rows) if rows else np.empty(0, dtype = np.intp)
+        cols = np.concatenate(cols) if cols else np.empty(0, dtype = np.intp)
+        if sparse_output:
+            matrix = sparse.csr_matrix((np.ones(len(rows), dtype = np.uint8), (rows, cols)), shape = (len(data), offset))
+            return pd.DataFrame.sparse.from_spmatrix(matrix, index = data.index, columns = self.feature_names())
+        matrix = np.zeros((len(data), offset), dtype = np.uint8)
+        matrix[rows, cols] = 1
+        return pd.DataFrame(matrix, index = data.index, columns = self.feature_names())
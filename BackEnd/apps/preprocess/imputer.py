@@ -0,0 +1,132 @@
+import warnings
+import numpy as np
+from sklearn.neighbors import KDTree
+
+class NeighborImputer:
+    """
+    *
+    * filename: imputer.py
+    * version: 1.0
+    * author: Ray Joshi
+    * Creation date: 10/18/2026
+    *
+    * Change History:
+    *
+    * who       when        version     change (include bug = if apply)
+    * -----     -------     -------     -------------------------------
+    * Ray       10/18/2026  1.0         Initial Creation
+    * Ray       10/18/2026  1.1         bug = build the trees of new patterns under a lock
+    * Ray       10/18/2026  1.2         bug = build trees only at fit, new patterns get the medians
+    *
+    *
+    * Description: Class to impute missing feature values from the nearest complete training rows. It is fitted
+    *               once at training and saved with the preprocessing pipeline. Neighbors are searched in a
+    *               KD-tree over the observed columns of each missing-value pattern, built once per pattern,
+    *               so a query costs O(log n) instead of a scan of every training row. Column medians are kept
+    *               as a statistical fallback for low-latency single-row scoring.
+    *               The trees of the training patterns are built at fit and only read afterwards, so request
+    *               threads share the imputer without a lock. Every tree holds a copy of the reference rows, so
+    *               a pattern first seen at prediction gets the medians instead of a tree of its own.
+    """
+
+    def __init__(self, n_neighbors = 3, reference_size = 100000, chunk_size = 10000):
+        self.n_neighbors = n_neighbors
+        self.reference_size = reference_size
+        self.chunk_size = chunk_size
+        self.reference = None
+        self.statistics = None
+        self.trees = {}
+
+    def fit(self, features):
+        """
+        * Method: fit
+        * Description: method to keep a sample of the complete rows as neighbor candidates, compute the column
+        *               medians and build the trees of the missing-value patterns of the training features
+        :return: The fitted imputer
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   features: 2-D array or DataFrame of the training features
+        """
+        features = np.asarray(features, dtype = np.float64)
+        missing = np.isnan(features)
+        with warnings.catch_warnings():
+            # Columns without any value get a median of 0
+            warnings.simplefilter('ignore', RuntimeWarning)
+            self.statistics = np.nan_to_num(np.nanmedian(features, axis = 0))
+        self.reference = features[~missing.any(axis = 1)]
+        if len(self.reference) > self.reference_size:
+            rows = np.random.default_rng(0).choice(len(self.reference), self.reference_size, replace = False)
+            self.reference = self.reference[np.sort(rows)]
+        self.trees = {}
+        if len(self.reference):
+            for pattern in np.unique(missing[missing.any(axis = 1)], axis = 0):
+                self.tree(pattern, build = True)
+        return self
+
+    def tree(self, pattern, build = False):
+        """
+        * Method: tree
+        * Description: method to get the KD-tree over the observed columns of a missing-value pattern, building
+        *               it at fit
+        :return: KDTree, None for a pattern not seen at fit
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        * Ray       10/18/2026  1.1         bug = build under the lock, concurrent requests shared the dictionary
+        * Ray       10/18/2026  1.2         bug = build only at fit, the trees of new patterns were never released
+        *
+        * Parameters:
+        *   pattern: boolean array, True for the missing columns
+        *   build: build the tree when missing, set at fit
+        """
+        key = pattern.tobytes()
+        tree = self.trees.get(key)
+        if tree is None and build:
+            tree = KDTree(self.reference[:, ~pattern])
+            self.trees[key] = tree
+        return tree
+
+    def transform(self, features, statistical = False):
+        """
+        * Method: transform
+        * Description: method to fill the missing values with the mean of the nearest complete training rows,
+        *               or with the training medians when statistical is set, no neighbor can be used or the
+        *               missing-value pattern was not seen at fit
+        :return: 2-D float array without missing values
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        * Ray       10/18/2026  1.2         Medians for the patterns not seen at fit
+        *
+        * Parameters:
+        *   features: 2-D array or DataFrame with the columns of the training features
+        *   statistical: use the median fallback only
+        """
+        features = np.array(features, dtype = np.float64)
+        missing = np.isnan(features)
+        rows = np.flatnonzero(missing.any(axis = 1))
+        if not len(rows):
+            return features
+        if statistical or not len(self.reference):
+            features[missing] = self.statistics[np.nonzero(missing)[1]]
+            return features
+        k = min(self.n_neighbors, len(self.reference))
+        patterns, inverse = np.unique(missing[rows], axis = 0, return_inverse = True)
+        for p, pattern in enumerate(patterns):
+            group = rows[inverse.ravel() == p]
+            tree = None if pattern.all() else self.tree(pattern)
+            if tree is None:
+                features[np.ix_(group, pattern)] = self.statistics[pattern]
+                continue
+            # Queries are chunked so the neighbor arrays stay small for very large batches
+            for start in range(0, len(group), self.chunk_size):
+                block = group[start:start + self.chunk_size]
+                _, neighbors = tree.query(features[np.ix_(block, ~pattern)], k = k)
+                features[np.ix_(block, pattern)] = self.reference[neighbors][:, :, pattern].mean(axis = 1)
+        return features
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+from apps.preprocess.categorical_encoder import CategoricalEncoder
+from apps.preprocess.imputer import NeighborImputer
+
+class PreprocessingPipeline:
+    """
+    *
+    * filename: pipeline.py
+    * version: 1.0
+    * author: Ray Joshi
+    * Creation date: 10/18/2026
+    *
+    * Change History:
+    *
+    * who       when        version     change (include bug = if apply)
+    * -----     -------     -------     -------------------------------
+    * Ray       10/18/2026  1.0         Initial Creation
+    * Ray       10/18/2026  1.1         Category codes from the fixed-vocabulary CategoricalEncoder
+    * Ray       10/18/2026  1.2         Indexed NeighborImputer with a statistical fallback
+    * Ray       10/18/2026  1.3         Remove the raw dtypes, numeric columns are parsed as float at prediction
+    *
+    *
+    * Description: Class holding the preprocessing fitted at training: category vocabulary, feature column order
+    *               and imputer. It is saved with the models and applied at prediction as an array transform,
+    *               so the prediction features always have the training columns. Numeric columns are parsed
+    *               as float, and categories outside the vocabulary encode as the dropped first category.
+    """
+
+    def __init__(self):
+        self.numeric_columns = []
+        self.vocabulary = {}
+        self.encoder = None
+        self.feature_columns = []
+        self.feature_sources = []
+        self.imputer = None
+
+    def fit(self, raw_features, encoded_features, encoder = None, imputer = None):
+        """
+        * Method: fit
+        * Description: method to learn the preprocessing from the training features
+        :return: The fitted pipeline
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        * Ray       10/18/2026  1.1         Vocabulary of the training encoder
+        * Ray       10/18/2026  1.2         Imputer fitted at training
+        *
+        * Parameters:
+        *   raw_features: training features before encoding, without empid and label
+        *   encoded_features: training features as given to the models
+        *   encoder: CategoricalEncoder used at training, fitted on raw_features if None
+        *   imputer: NeighborImputer used at training, fitted on encoded_features if None
+        """
+        self.encoder = encoder or CategoricalEncoder().fit(raw_features)
+        self.vocabulary = {col: categories for col, categories in self.encoder.vocabulary.items() if col in raw_features.columns}
+        self.numeric_columns = [col for col in raw_features.columns if col not in self.vocabulary]
+        self.feature_columns = list(encoded_features.columns)
+
+        # Each feature column comes either from a numeric column or from one category of a categorical column
+        dummies = {col + '_' + str(category): (col, category)
+                   for col, categories in self.vocabulary.items() for category in categories}
+        self.feature_sources = []
+        for col in self.feature_columns:
+            if col in self.numeric_columns:
+                self.feature_sources.append((col, None))
+            elif col in dummies:
+                self.feature_sources.append(dummies[col])
+            else:
+                raise KeyError('Feature column %s not found in the training data' % col)
+
+        self.imputer = imputer or NeighborImputer().fit(encoded_features)
+        return self
+
+    def encode(self, data):
+        """
+        * Method: encode
+        * Description: method to build the feature array in training column order. Categories outside the
+        *               vocabulary and missing categories encode as all zeros, like the dropped first category.
+        :return: 2-D float array
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        * Ray       10/18/2026  1.1         Codes from the CategoricalEncoder
+        *
+        * Parameters:
+        *   data: DataFrame with the raw feature columns
+        """
+        features = np.empty((len(data), len(self.feature_columns)), dtype = np.float64)
+        codes = {col: self.encoder.codes(data, col) for col in self.vocabulary}
+        for j, (col, category) in enumerate(self.feature_sources):
+            if category is None:
+                features[:, j] = pd.to_numeric(data[col], errors = 'coerce').to_numpy(dtype = np.float64)
+            else:
+                features[:, j] = codes[col] == self.vocabulary[col].index(category)
+        return features
+
+    def transform(self, data, statistical = False):
+        """
+        * Method: transform
+        * Description: method to encode the raw features and impute missing values with the training imputer
+        :return: 2-D float array in training column order
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        * Ray       10/18/2026  1.2         Statistical imputation fallback
+        *
+        * Parameters:
+        *   data: DataFrame with the raw feature columns
+        *   statistical: impute with the training medians instead of the nearest training rows
+        """
+        features = self.encode(data)
+        if np.isnan(features).any():
+            features = self.imputer.transform(features, statistical)
+        return features
@@ -1,8 +1,11 @@
+import json
 import pandas as pd
 import numpy as np
-import json
-from sklearn.impute import KNNImputer
+from apps.core.config import Config
 from apps.core.logger import Logger
+from apps.preprocess.categorical_encoder import CategoricalEncoder
+from apps.preprocess.imputer import NeighborImputer
+from apps.preprocess.pipeline import PreprocessingPipeline
 
 class Preprocessor:
     """
@@ -17,6 +20,13 @@ class Preprocessor:
     * who       when        version     change (include bug = if apply)
     * -----     -------     -------     -------------------------------
     * Ray       03/29/2023  1.0         Initial Creation
+    * Ray       10/18/2026  1.1         Fitted preprocessing pipeline artifact
+    * Ray       10/18/2026  1.2         Chunked prediction set preprocessing
+    * Ray       10/18/2026  1.3         Read the memory-mapped columnar snapshot
+    * Ray       10/18/2026  1.4         Fixed-vocabulary vectorized feature encoding
+    * Ray       10/18/2026  1.5         Imputer fitted once at training and reused at prediction
+    * Ray       10/18/2026  1.6         Check the prediction schema categories against the training vocabulary
+    * Ray       10/18/2026  1.7         bug = pipeline of the model registry snapshot used by the request
     *
     *
     * Description: Class to preprocess training and predicting dataset
@@ -25,7 +35,61 @@ class Preprocessor:
     def __init__(self, run_id, data_path, mode):
         self.run_id = run_id
         self.data_path = data_path
+        self.mode = mode
         self.logger = Logger(self.run_id, 'Preprocessor', mode)
+        self.config = Config()
+        self.pipeline = None
+        self.encoder = None
+        self.imputer = None
+        self.checked_pipeline = None # Pipeline whose vocabulary was checked against schema_predict
+
+    def load_snapshot(self):
+        """
+        * Method: load_snapshot
+        * Description: method to open the columnar snapshot written by DatabaseOperation.export_snapshot.
+        *               Column files are memory mapped, nothing is parsed or read until it is sliced.
+        :return: Tuple of row count and list of (column name, schema type, mapped array, categories)
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.3         Initial Creation
+        *
+        * Parameters:
+        *   none
+        """
+        path = self.data_path + "_validation/snapshot/"
+        with open(path + "snapshot.json", "r") as f:
+            meta = json.load(f)
+        columns = [(col['name'], col['type'], np.load(path + col['name'] + '.npy', mmap_mode = 'r'), col['categories'])
+                   for col in meta['columns']]
+        return meta['rows'], columns
+
+    def snapshot_frame(self, columns, start, stop):
+        """
+        * Method: snapshot_frame
+        * Description: method to build a DataFrame from rows start to stop of the snapshot columns. Category codes
+        *               become object columns, INTEGER columns without missing values become int64.
+        :return: A Pandas DataFrame
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.3         Initial Creation
+        *
+        * Parameters:
+        *   columns: columns returned by load_snapshot
+        *   start: first row
+        *   stop: row after the last row
+        """
+        data = {}
+        for name, type, array, categories in columns:
+            values = array[start:stop]
+            if categories is not None:
+                data[name] = pd.Categorical.from_codes(values, categories = categories).astype(object)
+            elif type.upper() == 'INTEGER' and not np.isnan(values).any():
+                data[name] = values.astype(np.int64)
+            else:
+                data[name] = np.array(values)
+        return pd.DataFrame(data)
 
     def get_data(self):
         """
@@ -36,6 +100,7 @@ class Preprocessor:
         * who       when        version     change (include bug = if apply)
         * -----     -------     -------     -------------------------------
         * Ray       03/29/2023  1.0         Initial Creation
+        * Ray       10/18/2026  1.3         Read the columnar snapshot instead of InputFile.csv
         *
         * Parameters:
         *   none
@@ -43,13 +108,35 @@ class Preprocessor:
         try:
             # Reading the data file
             self.logger.info('Start of Reading Dataset...')
-            self.data = pd.read_csv(self.data_path + "_validation/InputFile.csv")
+            rows, columns = self.load_snapshot()
+            self.data = self.snapshot_frame(columns, 0, rows)
             self.logger.info("End of Reading Dataset...")
             return self.data
         except Exception as e:
             self.logger.exception("Exception raised while Reading Dataset: %s" % e)
             raise Exception()
 
+    def get_data_chunks(self, chunk_size = None):
+        """
+        * Method: get_data_chunks
+        * Description: method to read the datafile in chunks, so only one chunk is in memory at a time
+        :return: Generator of Pandas DataFrames
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.2         Initial Creation
+        * Ray       10/18/2026  1.3         Slice the memory-mapped snapshot
+        *
+        * Parameters:
+        *   chunk_size: rows per chunk, defaults to Config.prediction_chunk_size
+        """
+        self.logger.info('Start of Reading Dataset in chunks...')
+        chunk_size = chunk_size or self.config.prediction_chunk_size
+        rows, columns = self.load_snapshot()
+        for start in range(0, rows, chunk_size):
+            yield self.snapshot_frame(columns, start, min(start + chunk_size, rows))
+        self.logger.info("End of Reading Dataset...")
+
     def drop_columns(self, data, columns):
         """
         * Method: drop_columns
@@ -59,13 +146,14 @@ class Preprocessor:
         * who       when        version     change (include bug = if apply)
         * -----     -------     -------     -------------------------------
         * Ray       03/29/2023  1.0         Initial Creation
+        * Ray       10/18/2026  1.1         bug = drop from the given data and columns
         *
         * Parameters:
         *   data, columns
         """
         try:
             self.logger.info("Start of Dropping Columns...")
-            self.useful_data = self.data.drop(labels = self.columns, axis = 1) # Drop the labels specified in the columns
+            self.useful_data = data.drop(labels = columns, axis = 1) # Drop the labels specified in the columns
             self.logger.info("End of Dropping COlumns...")
             return self.useful_data
         except Exception as e:
@@ -107,12 +195,14 @@ class Preprocessor:
     def impute_missing_values(self, data):
         """
         * Method: impute_missing_values
-        * Description: method to impute missing values
-        :return: none
+        * Description: method to impute missing values from the nearest complete rows with the NeighborImputer,
+        *               fitted on the data the first time
+        :return: DataFrame without missing values
         *
         * who       when        version     change (include bug = if apply)
         * -----     -------     -------     -------------------------------
         * Ray       03/29/2023  1.0         Initial Creation
+        * Ray       10/18/2026  1.5         KD-tree NeighborImputer fitted once instead of KNNImputer
         *
         * Parameters:
         *   data
@@ -120,35 +210,53 @@ class Preprocessor:
         self.data = data
         try:
             self.logger.info("Start of Imputing Missing Values...")
-            imputer = KNNImputer(n_neighbors = 3, weights = 'uniform', missing_values = np.nan)
-            self.new_array = imputer.fit_transform(self.data)
+            if self.imputer is None:
+                self.imputer = NeighborImputer(self.config.imputer_neighbors, self.config.imputer_reference_size).fit(self.data)
+            self.new_array = self.imputer.transform(self.data)
             # Conver the nd-array returned in the step above to a DataFrame
-            self.new_data = pd.DataFrame(data = self.new_array, columns = self.data.columns)
+            self.new_data = pd.DataFrame(data = self.new_array, columns = self.data.columns, index = self.data.index)
             self.logger.info("End of Imputing Missing Values...")
             return self.new_data
         except Exception as e:
             self.logger.exception("Exception raised while Imputing Missing Values: " + str(e))
             raise Exception()
 
+    def categories_from_schema(self, schema_file):
+        """
+        * Method: categories_from_schema
+        * Description: method to read the category vocabulary declared in the schema
+        :return: Dictionary of column name to list of categories, empty if the schema declares none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.4         Initial Creation
+        *
+        * Parameters:
+        *   schema_file
+        """
+        with open('apps/database/' + schema_file + ".json", "r") as f:
+            return json.load(f).get('Categories', {})
+
     def feature_encoding(self, data):
         """
         * Method: feature_encoding
-        * Description: method to encode features of columns
-        :return: none
+        * Description: method to encode features of columns. Categories come from the schema vocabulary, or are
+        *               learned from the data for object columns the schema does not declare.
+        :return: DataFrame of one-hot columns, sparse if Config.sparse_encoding
         *
         * who       when        version     change (include bug = if apply)
         * -----     -------     -------     -------------------------------
         * Ray       03/29/2023  1.0         Initial Creation
+        * Ray       10/18/2026  1.4         One-shot encoding with the fixed-vocabulary CategoricalEncoder
         *
         * Parameters:
         *   data
         """
         try:
             self.logger.info("Start of Feature Encoding")
-            self.new_data = data.select_dtypes(include = ['object'].copy())
-            # Using dummy encoding to encode the categorical columns to numerical ones
-            for col in self.new_data.columns:
-                self.new_data = pd.get_dummies(self.new_data, columns = [col], prefix = [col], drop_first = True)
+            self.encoder = CategoricalEncoder(self.categories_from_schema('schema_train')).fit(data)
+            # Dummy encoding of every categorical column in one pass
+            self.new_data = self.encoder.transform(data, self.config.sparse_encoding)
             self.logger.info("End of Feature Encoding")
             return self.new_data
         except Exception as e:
@@ -179,39 +287,6 @@ class Preprocessor:
             self.logger.exception("Exception raised while Splitting Features and Label: " + str(e))
             raise Exception()
 
-    def final_predictset(self, data):
-        """
-        * Method: final_predict_set
-        * Description: method to build final predict set by adding additional encoded column with value as 0
-        :return: column_names, Number of columns
-        *
-        * who       when        version     change (include bug = if apply)
-        * -----     -------     -------     -------------------------------
-        * Ray       03/29/2023  1.0         Initial Creation
-        *
-        * Parameters:
-        *   data
-        """
-        try:
-            self.logger.info("Start of building final predictset...")
-            with open('apps/database/columns.json', 'r') as f:
-                data_columns = json.load(f)['data_columns']
-                f.close()
-            df = pd.DataFrame(data = None, columns = data_columns)
-            df_new = pd.concat([df, data], ignore_index = True, sort = False)
-            data_new = df_new.fillna(0)
-            self.logger.info("End of building final predictset...")
-            return data_new
-        except ValueError:
-            self.logger.exception("ValueError raised while building final predictset")
-            raise ValueError
-        except KeyError:
-            self.logger.exception("KeyError raised while building final predictset")
-            raise KeyError
-        except Exception as e:
-            self.logger.exception("Exception raised while building final predictset: " + str(e))
-            raise e
-
     def preprocess_trainset(self):
         """
         * Method: preprocess_trainset
@@ -221,6 +296,9 @@ class Preprocessor:
         * who       when        version     change (include bug = if apply)
         * -----     -------     -------     -------------------------------
         * Ray       03/29/2023  1.0         Initial Creation
+        * Ray       10/18/2026  1.1         Fit the preprocessing pipeline
+        * Ray       10/18/2026  1.4         Drop the columns encoded by the CategoricalEncoder
+        * Ray       10/18/2026  1.5         Impute the features only, with the imputer saved in the pipeline
         *
         * Parameters:
         *   none
@@ -231,89 +309,137 @@ class Preprocessor:
             data = self.get_data()
             # Drop unwanted columns
             data = self.drop_columns(data, ['empid'])
+            raw_features = data.drop(labels = 'left', axis = 1)
             # Handle Label encoding
             cat_df = self.feature_encoding(data)
             data = pd.concat([data, cat_df], axis = 1)
-            # Drop categorical column
-            data = self.drop_columns(data, ['salary'])
+            # Drop categorical columns
+            data = self.drop_columns(data, list(self.encoder.vocabulary))
+            # Rows without a label cannot be trained on
+            unlabeled = data['left'].isna()
+            if unlabeled.any():
+                self.logger.info("Dropping %d rows without label" % unlabeled.sum())
+                data = data[~unlabeled].reset_index(drop = True)
+            # Create separate features and labels
+            self.X, self.y = self.split_features_label(data, label_name = 'left')
+            # Fit the imputer once, it is saved with the pipeline and reused at prediction
+            self.imputer = NeighborImputer(self.config.imputer_neighbors, self.config.imputer_reference_size).fit(self.X)
             # Check if missing values are present in the data set
-            is_null_present = self.is_null_present(data)
+            is_null_present = self.is_null_present(self.X)
             # If missing values are present, replace them appropriately
             if (is_null_present):
-                data = self.impute_missing_values(data) # Missing values imputation
-            # Create separate features and labels
-            self.X, self.y = self.split_features_label(data, label_name = 'left')
+                self.X = self.impute_missing_values(self.X) # Missing values imputation
+            # Fit the preprocessing pipeline saved with the models and applied at prediction
+            self.pipeline = PreprocessingPipeline().fit(raw_features, self.X, self.encoder, self.imputer)
             self.logger.info("End of preprocessing...")
             return self.X, self.y
         except Exception:
             self.logger.exception('Unsuccessful End of Preprocessing...')
             raise Exception
 
-    def preprocess_predictset(self):
+    def check_categories(self, pipeline):
+        """
+        * Method: check_categories
+        * Description: method to check that the categories declared in schema_predict are the vocabulary the
+        *               pipeline was trained with, so the prediction schema cannot drift from the models
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.6         Initial Creation
+        *
+        * Parameters:
+        *   pipeline: PreprocessingPipeline fitted at training
+        """
+        for col, categories in self.categories_from_schema('schema_predict').items():
+            trained = pipeline.vocabulary.get(col)
+            if trained is None or set(trained) != set(categories):
+                raise ValueError('schema_predict categories of %s are %s, the models were trained with %s'
+                                 % (col, sorted(categories), trained if trained is None else sorted(trained)))
+
+    def get_pipeline(self, models):
+        """
+        * Method: get_pipeline
+        * Description: method to get the preprocessing pipeline fitted at training from a model registry snapshot.
+        *               At prediction, each new pipeline is checked once against the schema_predict categories.
+        :return: PreprocessingPipeline
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.1         Initial Creation
+        * Ray       10/18/2026  1.6         Check the schema_predict categories
+        * Ray       10/18/2026  1.7         Pipeline of the snapshot used by the request
+        *
+        * Parameters:
+        *   models: ModelSnapshot of the request or batch
+        """
+        pipeline = models.pipeline
+        if self.mode == 'prediction' and pipeline is not self.checked_pipeline:
+            self.check_categories(pipeline)
+            self.checked_pipeline = pipeline
+        return pipeline
+
+    def preprocess_predictset(self, models, chunk_size = None):
         """
         * Method: preprocess_predictset
-        * Description: method to preprocess prediction set
-        :return: A pandas DataFrame after removing the specified column
+        * Description: method to preprocess prediction set with the preprocessing pipeline fitted at training.
+        *               The set is read and transformed one chunk at a time. Missing values are counted over
+        *               all chunks and written to null_values.csv at the end.
+        :return: Generator of (array of empids, feature array in training column order), one per chunk
         *
         * who       when        version     change (include bug = if apply)
         * -----     -------     -------     -------------------------------
         * Ray       03/29/2023  1.0         Initial Creation
+        * Ray       10/18/2026  1.1         Apply the fitted preprocessing pipeline
+        * Ray       10/18/2026  1.2         Yield the prediction set in chunks
+        * Ray       10/18/2026  1.7         Pipeline of the model registry snapshot of the batch
         *
         * Parameters:
-        *   none
+        *   models: ModelSnapshot of the batch
+        *   chunk_size: rows per chunk, defaults to Config.prediction_chunk_size
         """
         try:
             self.logger.info("Start of Preorcessing Prediction set...")
-            # Get data into pandas data frame
-            data = self.get_data()
-            # Drop unwanted columns
-            # data = self.drop_columns(data, ['empid'])
-            # handle label encoding
-            cat_df = self.feature_encoding(data)
-            data = pd.concat([data, cat_df], axis = 1)
-            # drop categorical column
-            data = self.drop_columns(data, ['salary'])
-            # Check if missing values are present in the data set
-            is_null_present = self.is_null_present(data)
-            # If missing values are there, replace them appropriately.
-            if (is_null_present):
-                data = self.impute_missing_values(data) # Missing value imputation
-
-            data = self.final_predictset(data)
+            pipeline = self.get_pipeline(models)
+            null_counts = None
+            for data in self.get_data_chunks(chunk_size):
+                # Count the missing values of the chunk
+                null_counts = data.isna().sum() if null_counts is None else null_counts + data.isna().sum()
+                # Encode, order and impute with the training pipeline
+                yield data['empid'].to_numpy(), pipeline.transform(data)
+            if null_counts is not None and null_counts.any(): # Write the logs to see which columns have null values
+                pd.DataFrame({'columns': null_counts.index, 'missing values count': null_counts.to_numpy()}) \
+                    .to_csv(self.data_path + "_validation/" + "null_values.csv")
             self.logger.info("End of Preprocessing Prediction set...")
-            return data
         except Exception:
             self.logger.exception("Unsuccessful End of Preprocessing...")
             raise Exception
 
-    def preprocess_predict(self, data):
+    def preprocess_predict(self, data, models):
         """
         * Method: preprocess_predict
-        * Description: method to preprocess prediction set
-        :return: A pandas DataFrame after removing the specified column
+        * Description: method to preprocess prediction rows with the preprocessing pipeline fitted at training.
+        *               Missing values are imputed with the training medians when Config.online_imputation
+        *               is 'statistical', to keep single-row scoring fast.
+        :return: Array of empids and feature array in training column order
         *
         * who       when        version     change (include bug = if apply)
         * -----     -------     -------     -------------------------------
         * Ray       03/29/2023  1.0         Initial Creation
+        * Ray       10/18/2026  1.1         Apply the fitted preprocessing pipeline
+        * Ray       10/18/2026  1.5         Statistical imputation for online scoring
+        * Ray       10/18/2026  1.7         Pipeline of the model registry snapshot of the request
         *
         * Parameters:
-        *   none
+        *   data
+        *   models: ModelSnapshot of the request
         """
         try:
             self.logger.info("Start of Preprocessing...")
-            cat_df = self.feature_encoding(data)
-            data = pd.concat([data, cat_df], axis = 1)
-            # Drop categorical column
-            data = self.drop_columns(data, ['salary'])
-            # Check if missing values are present in the data set
-            is_null_present = self.is_null_present(data)
-            # If missing values are present, replace them appropriately
-            if (is_null_present):
-                data = self.impute_missing_values(data) # Missing values imputation
-
-            data = self.final_predictset(data)
+            # Encode, order and impute with the training pipeline
+            features = self.get_pipeline(models).transform(data, self.config.online_imputation == 'statistical')
             self.logger.info("End of Preprocessing...")
-            return data
+            return data['empid'].to_numpy(), features
         except Exception:
             self.logger.exception("Unsuccessful End of Preprocessing")
             raise Exception
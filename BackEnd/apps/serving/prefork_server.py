@@ -0,0 +1,254 @@
+import gc
+import os
+import signal
+import threading
+import time
+from socketserver import ThreadingMixIn
+from wsgiref import simple_server
+from apps.core.config import Config
+from apps.core.logger import Logger
+from apps.core.model_registry import ModelRegistry
+
+class ThreadingWSGIServer(ThreadingMixIn, simple_server.WSGIServer):
+    """
+    * Description: WSGI server handling each request in its own thread, so concurrent /predict calls can be batched
+    """
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class PreforkServer:
+    """
+    *
+    * filename: prefork_server.py
+    * version: 1.0
+    * author: Ray Joshi
+    * Creation date: 10/18/2026
+    *
+    * Change History:
+    *
+    * who       when        version     change (include bug = if apply)
+    * -----     -------     -------     -------------------------------
+    * Ray       10/18/2026  1.0         Initial Creation
+    * Ray       10/18/2026  1.1         Post-fork hook for per-worker background threads
+    * Ray       10/18/2026  1.2         Flush the queued logs before a worker exits
+    * Ray       10/18/2026  1.3         bug = workers write and rotate log files of their own
+    * Ray       10/18/2026  1.4         bug = worker slot passed to the post-fork hook
+    *
+    *
+    * Description: Class to serve a WSGI server from several worker processes. The parent loads the models,
+    *               then forks the workers, so they share the read-only model memory copy-on-write. Every
+    *               worker accepts on the same listening socket and handles requests in threads.
+    *               Dead workers are replaced. SIGHUP reloads the models and replaces every worker after its
+    *               in-flight requests finish. SIGTERM or SIGINT stops the workers the same way and exits.
+    *               Needs os.fork, so it is only available on POSIX systems. Threads are not copied by fork,
+    *               so post_fork is called in each worker to start its own background threads. It gets the
+    *               slot of the worker, 0 to workers - 1, kept by its replacements, so background work needed
+    *               once per server can run in the worker of one slot.
+    """
+
+    def __init__(self, httpd, run_id, workers = None, post_fork = None):
+        self.httpd = httpd
+        self.run_id = run_id
+        self.post_fork = post_fork
+        self.config = Config()
+        self.workers = workers or self.config.server_workers
+        self.logger = Logger(self.run_id, 'PreforkServer', 'prediction')
+        self.modelRegistry = ModelRegistry(self.run_id, self.config.prediction_data_path, 'prediction')
+        self.children = {} # Worker pid to generation
+        self.slots = {} # Worker pid to slot
+        self.generation = 0
+        self.running = True
+        self.restart_requested = False
+
+    def preload(self):
+        """
+        * Method: preload
+        * Description: method to load the models in the parent before forking. Serving starts without them
+        *               when no model has been trained yet.
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   none
+        """
+        try:
+            self.modelRegistry.refresh(force = True)
+            self.logger.info('Models preloaded before forking the workers')
+        except Exception as e:
+            self.logger.info('Serving without preloaded models: %s' % e)
+        # Keep the loaded objects out of the garbage collector so workers do not touch their pages
+        gc.collect()
+        gc.freeze()
+
+    def spawn_worker(self, slot):
+        """
+        * Method: spawn_worker
+        * Description: method to fork one worker process of the current generation
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        * Ray       10/18/2026  1.2         Flush the logs, os._exit skips the exit hooks
+        * Ray       10/18/2026  1.4         Worker slot
+        *
+        * Parameters:
+        *   slot: slot of the worker, 0 to workers - 1
+        """
+        pid = os.fork()
+        if pid == 0:
+            status = 0
+            try:
+                self.run_worker(slot)
+            except Exception as e:
+                self.logger.exception('Exception raised in Worker %d: %s' % (os.getpid(), e))
+                status = 1
+            finally:
+                Logger.shutdown()
+                os._exit(status)
+        self.children[pid] = self.generation
+        self.slots[pid] = slot
+
+    def run_worker(self, slot):
+        """
+        * Method: run_worker
+        * Description: method run in a worker process. SIGTERM stops accepting new connections and the worker
+        *               exits once its in-flight requests are finished.
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        * Ray       10/18/2026  1.1         Call the post-fork hook
+        * Ray       10/18/2026  1.3         Per-worker log files, rotated by the worker
+        * Ray       10/18/2026  1.4         Slot passed to the post-fork hook
+        *
+        * Parameters:
+        *   slot: slot of the worker, 0 to workers - 1
+        """
+        # server_close waits for request threads only when they are not daemon threads
+        self.httpd.daemon_threads = False
+        signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target = self.httpd.shutdown).start())
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        Logger.own_files()
+        if self.post_fork is not None:
+            self.post_fork(slot)
+        self.logger.info('Worker %d started' % os.getpid())
+        self.httpd.serve_forever()
+        self.httpd.server_close()
+        self.logger.info('Worker %d stopped' % os.getpid())
+
+    def stop_workers(self, generation = None):
+        """
+        * Method: stop_workers
+        * Description: method to ask workers to stop gracefully
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   generation: only stop the workers of this generation, all workers if None
+        """
+        for pid, worker_generation in list(self.children.items()):
+            if generation is None or worker_generation == generation:
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    self.children.pop(pid, None)
+                    self.slots.pop(pid, None)
+
+    def reap_workers(self):
+        """
+        * Method: reap_workers
+        * Description: method to collect exited workers and replace the ones of the current generation
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   none
+        """
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                return
+            if pid == 0:
+                return
+            generation = self.children.pop(pid, None)
+            slot = self.slots.pop(pid, None)
+            if self.running and generation == self.generation:
+                self.logger.info('Worker %d exited with status %d, starting a replacement' % (pid, status))
+                self.spawn_worker(slot)
+
+    def restart(self):
+        """
+        * Method: restart
+        * Description: method to reload the models and replace every worker. The new workers are started before
+        *               the old ones are asked to stop, so the socket is always served.
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   none
+        """
+        self.logger.info('Graceful restart of %d workers' % self.workers)
+        gc.unfreeze()
+        self.preload()
+        old_generation = self.generation
+        self.generation += 1
+        for slot in range(self.workers):
+            self.spawn_worker(slot)
+        self.stop_workers(old_generation)
+
+    def serve_forever(self):
+        """
+        * Method: serve_forever
+        * Description: method to preload the models, fork the workers and supervise them until SIGTERM or SIGINT
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   none
+        """
+        self.preload()
+        for slot in range(self.workers):
+            self.spawn_worker(slot)
+        self.logger.info('Serving with %d workers' % self.workers)
+        signal.signal(signal.SIGHUP, lambda signum, frame: setattr(self, 'restart_requested', True))
+        signal.signal(signal.SIGTERM, lambda signum, frame: setattr(self, 'running', False))
+        signal.signal(signal.SIGINT, lambda signum, frame: setattr(self, 'running', False))
+        try:
+            while self.running:
+                if self.restart_requested:
+                    self.restart_requested = False
+                    self.restart()
+                self.reap_workers()
+                time.sleep(0.2)
+        finally:
+            self.stop_workers()
+            while self.children:
+                try:
+                    pid, _ = os.waitpid(-1, 0)
+                except ChildProcessError:
+                    break
+                self.children.pop(pid, None)
+                self.slots.pop(pid, None)
+            self.httpd.server_close()
+            self.logger.info('Server stopped')
@@ -0,0 +1,413 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from apps.core.config import Config
+from apps.core.logger import Logger
+from apps.core.metrics import Metrics
+from apps.training.train_model import TrainModel
+
+class TrainingJobQueue:
+    """
+    *
+    * filename: job_queue.py
+    * version: 1.0
+    * author: Ray Joshi
+    * Creation date: 10/18/2026
+    *
+    * Change History:
+    *
+    * who       when        version     change (include bug = if apply)
+    * -----     -------     -------     -------------------------------
+    * Ray       10/18/2026  1.0         Initial Creation
+    * Ray       10/18/2026  1.1         Release the run log file after each job
+    * Ray       10/18/2026  1.2         bug = train in a dedicated process that outlives a server restart
+    * Ray       10/18/2026  1.3         bug = reset the stage memory peaks in the training process only
+    * Ray       10/18/2026  1.4         bug = one polling process, job pid set by the training process only
+    *
+    *
+    * Description: Class to run training jobs in the background. Jobs are keyed by run id and kept in a SQLite
+    *               job table, so queued jobs survive a server restart. Any server process can queue a job,
+    *               but only the process that called start polls the table: its worker threads claim the
+    *               oldest queued job while fewer than Config.training_job_workers jobs are running. Each job
+    *               is trained in its own process, started in a new session, so stopping or restarting the
+    *               server worker that claimed it does not interrupt it, and its cluster pool is not forked
+    *               from a multi-threaded server process. The job row holds the pid of that process only,
+    *               never the pid of the claiming server worker. Running jobs whose process is gone, or that
+    *               have no process Config.job_claim_timeout seconds after their claim, are queued again
+    *               before every claim.
+    """
+    table_name = 'training_job_t'
+
+    def __init__(self, run_id):
+        self.run_id = run_id
+        self.config = Config()
+        self.logger = Logger(self.run_id, 'TrainingJobQueue', 'training')
+        self.database_path = 'apps/database/' + self.config.jobs_database + '.db'
+        self.workers = max(1, self.config.training_job_workers)
+        self.poll_interval = self.config.job_poll_interval
+        self.claim_timeout = self.config.job_claim_timeout
+        self.wakeup = threading.Event()
+        self.lock = threading.Lock()
+        self.threads = []
+        self.pid = None
+
+    def connect(self):
+        """
+        * Method: connect
+        * Description: method to open the job database in autocommit mode and create the job table, adding
+        *               the claimed_at column to a table created before it
+        :return: connection
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        * Ray       10/18/2026  1.4         claimed_at column
+        *
+        * Parameters:
+        *   none
+        """
+        conn = sqlite3.connect(self.database_path, timeout = 30, isolation_level = None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('CREATE TABLE IF NOT EXISTS ' + self.table_name + ' ('
+                     'run_id TEXT PRIMARY KEY, data_path TEXT, status TEXT, stage TEXT, progress REAL, '
+                     'submitted_at REAL, started_at REAL, finished_at REAL, stage_timings TEXT, pid INTEGER, error TEXT, '
+                     'claimed_at REAL)')
+        if 'claimed_at' not in [row['name'] for row in conn.execute('PRAGMA table_info(' + self.table_name + ')')]:
+            try:
+                conn.execute('ALTER TABLE ' + self.table_name + ' ADD COLUMN claimed_at REAL')
+            except sqlite3.OperationalError:
+                # Another process may have added it meanwhile
+                if 'claimed_at' not in [row['name'] for row in conn.execute('PRAGMA table_info(' + self.table_name + ')')]:
+                    raise
+        return conn
+
+    def enqueue(self, run_id, data_path):
+        """
+        * Method: enqueue
+        * Description: method to add a queued training job. A worker thread of this process is woken up, the
+        *               polling process of another server worker claims it on its next poll.
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        * Ray       10/18/2026  1.4         Do not start worker threads, they run in one process only
+        *
+        * Parameters:
+        *   run_id: run id of the training job
+        *   data_path: training data path
+        """
+        try:
+            conn = self.connect()
+            try:
+                conn.execute('INSERT INTO ' + self.table_name + ' (run_id, data_path, status, stage, progress, submitted_at, stage_timings) '
+                             "VALUES (?, ?, 'queued', 'queued', 0, ?, '{}')", (run_id, data_path, time.time()))
+            finally:
+                conn.close()
+            self.logger.info('Training job %s queued' % run_id)
+            self.wakeup.set()
+        except Exception as e:
+            self.logger.exception('Exception raised while queuing Training job %s: %s' % (run_id, e))
+            raise Exception()
+
+    def status(self, run_id):
+        """
+        * Method: status
+        * Description: method to report the status, stage, progress and timings of a training job
+        :return: dictionary of the job, None if the run id is unknown
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   run_id: run id of the training job
+        """
+        conn = self.connect()
+        try:
+            row = conn.execute('SELECT * FROM ' + self.table_name + ' WHERE run_id = ?', (run_id,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        job = dict(row)
+        job.pop('pid')
+        job.pop('claimed_at')
+        job.pop('data_path')
+        job['stage_timings'] = json.loads(job['stage_timings'] or '{}')
+        if job['started_at'] is not None:
+            job['elapsed'] = (job['finished_at'] or time.time()) - job['started_at']
+        return job
+
+    def alive(self, pid):
+        """
+        * Method: alive
+        * Description: method to check that a process exists and is not a zombie waiting to be collected
+        :return: True if the process is running
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.2         Initial Creation
+        *
+        * Parameters:
+        *   pid: process id, None for a job not started yet
+        """
+        if pid is None:
+            return False
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        try:
+            with open('/proc/%d/stat' % pid) as stat:
+                return stat.read().rsplit(')', 1)[1].split()[0] != 'Z'
+        except (OSError, IndexError):
+            return True
+
+    def recover(self, conn = None):
+        """
+        * Method: recover
+        * Description: method to queue again the running jobs whose process is gone, and the jobs still without
+        *               process Config.job_claim_timeout seconds after their claim, whose claiming worker died
+        *               before starting it
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        * Ray       10/18/2026  1.2         Run inside the claim transaction, zombie processes are gone
+        * Ray       10/18/2026  1.4         bug = a job without pid is abandoned only once its claim is stale
+        *
+        * Parameters:
+        *   conn: connection of an open transaction, a new connection if None
+        """
+        own_connection = conn is None
+        if own_connection:
+            conn = self.connect()
+        try:
+            now = time.time()
+            for row in conn.execute('SELECT run_id, pid, claimed_at FROM ' + self.table_name + " WHERE status = 'running'").fetchall():
+                if row['pid'] is None:
+                    # Claimed, the training process may still be starting
+                    if row['claimed_at'] is not None and now - row['claimed_at'] < self.claim_timeout:
+                        continue
+                elif self.alive(row['pid']):
+                    continue
+                conn.execute('UPDATE ' + self.table_name + " SET status = 'queued', stage = 'queued', progress = 0, "
+                             "started_at = NULL, stage_timings = '{}', pid = NULL, claimed_at = NULL WHERE run_id = ? AND status = 'running'",
+                             (row['run_id'],))
+                self.logger.info('Training job %s was interrupted, queued again' % row['run_id'])
+        finally:
+            if own_connection:
+                conn.close()
+
+    def claim(self):
+        """
+        * Method: claim
+        * Description: method to mark the oldest queued job as running while the concurrency limit allows it.
+        *               BEGIN IMMEDIATE serializes the claim between the worker threads and a polling process
+        *               of the previous server generation. Jobs whose process is gone are queued again first,
+        *               so they do not count against the limit. The pid stays empty until the training
+        *               process starts.
+        :return: Tuple of run id and data path, None if no job can start
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        * Ray       10/18/2026  1.2         bug = queue again the jobs of dead processes on every claim
+        * Ray       10/18/2026  1.4         bug = claim time in place of the pid of the claiming process
+        *
+        * Parameters:
+        *   none
+        """
+        conn = self.connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            self.recover(conn)
+            running = conn.execute('SELECT count(*) FROM ' + self.table_name + " WHERE status = 'running'").fetchone()[0]
+            row = None
+            if running < self.workers:
+                row = conn.execute('SELECT run_id, data_path FROM ' + self.table_name +
+                                   " WHERE status = 'queued' ORDER BY submitted_at LIMIT 1").fetchone()
+            if row is not None:
+                now = time.time()
+                conn.execute('UPDATE ' + self.table_name + " SET status = 'running', started_at = ?, claimed_at = ?, pid = NULL "
+                             'WHERE run_id = ?', (now, now, row['run_id']))
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+        return None if row is None else (row['run_id'], row['data_path'])
+
+    def update(self, run_id, **fields):
+        """
+        * Method: update
+        * Description: method to update columns of a training job
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        *
+        * Parameters:
+        *   run_id: run id of the training job
+        *   fields: column names and values
+        """
+        conn = self.connect()
+        try:
+            conn.execute('UPDATE ' + self.table_name + ' SET ' + ', '.join(name + ' = ?' for name in fields) + ' WHERE run_id = ?',
+                         list(fields.values()) + [run_id])
+        finally:
+            conn.close()
+
+    def execute(self, run_id, data_path):
+        """
+        * Method: execute
+        * Description: method to train one job, recording the seconds spent in each stage. It runs in the
+        *               training process started by launch, which records its own pid first, so the job stays
+        *               owned even if the launching server worker dies.
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        * Ray       10/18/2026  1.1         Close the log file of the run
+        * Ray       10/18/2026  1.4         Record the pid of the training process
+        *
+        * Parameters:
+        *   run_id: run id of the training job
+        *   data_path: training data path
+        """
+        timings = {}
+        current = {'stage': None, 'started': time.time()}
+
+        def close_stage():
+            if current['stage'] is not None:
+                timings[current['stage']] = round(time.time() - current['started'], 3)
+
+        def progress(stage, fraction):
+            if stage != current['stage']:
+                close_stage()
+                current['stage'] = stage
+                current['started'] = time.time()
+            self.update(run_id, stage = stage, progress = round(fraction, 3), stage_timings = json.dumps(timings))
+
+        self.update(run_id, pid = os.getpid())
+        self.logger.info('Training job %s started' % run_id)
+        try:
+            TrainModel(run_id, data_path, progress).training_model()
+            close_stage()
+            self.update(run_id, status = 'succeeded', stage = 'done', progress = 1.0,
+                        finished_at = time.time(), stage_timings = json.dumps(timings))
+            self.logger.info('Training job %s succeeded' % run_id)
+        except Exception as e:
+            close_stage()
+            self.update(run_id, status = 'failed', finished_at = time.time(), stage_timings = json.dumps(timings),
+                        error = '%s failed, see train_log_%s.log' % (current['stage'], run_id))
+            self.logger.exception('Training job %s failed: %s' % (run_id, e))
+        finally:
+            # The server outlives its training runs, release their log files
+            Logger.close(run_id, 'training')
+
+    def launch(self, run_id, data_path):
+        """
+        * Method: launch
+        * Description: method to train a claimed job in a new process and wait for it. The job row gets the
+        *               pid of the training process as soon as it is started, the training process records it
+        *               as well, and records the job result itself. A training process that exits abnormally
+        *               while its job is still running fails the job.
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.2         Initial Creation
+        *
+        * Parameters:
+        *   run_id: run id of the training job
+        *   data_path: training data path
+        """
+        try:
+            process = subprocess.Popen([sys.executable, '-m', 'apps.training.job_queue', run_id, data_path],
+                                       start_new_session = True)
+            self.update(run_id, pid = process.pid)
+            self.logger.info('Training job %s running in process %d' % (run_id, process.pid))
+            returncode = process.wait()
+            if returncode != 0:
+                conn = self.connect()
+                try:
+                    conn.execute('UPDATE ' + self.table_name + " SET status = 'failed', finished_at = ?, error = ? "
+                                 "WHERE run_id = ? AND status = 'running'",
+                                 (time.time(), 'training process exited with code %d' % returncode, run_id))
+                finally:
+                    conn.close()
+                self.logger.info('Training job %s process exited with code %d' % (run_id, returncode))
+        except Exception as e:
+            self.logger.exception('Exception raised while launching Training job %s: %s' % (run_id, e))
+            self.update(run_id, status = 'failed', finished_at = time.time(), error = 'training process did not start')
+
+    def run(self):
+        """
+        * Method: run
+        * Description: method run by the worker threads, claiming and launching jobs until the process exits
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        * Ray       10/18/2026  1.2         Train in a separate process
+        *
+        * Parameters:
+        *   none
+        """
+        while True:
+            try:
+                job = self.claim()
+            except Exception as e:
+                self.logger.exception('Exception raised while claiming a Training job: %s' % e)
+                job = None
+            if job is None:
+                self.wakeup.wait(self.poll_interval)
+                self.wakeup.clear()
+                continue
+            self.launch(*job)
+
+    def start(self):
+        """
+        * Method: start
+        * Description: method to queue again the interrupted jobs and start the worker threads. It is called in
+        *               one server process only, the single process or the first prefork worker, so the server
+        *               processes do not all poll the job table.
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.0         Initial Creation
+        * Ray       10/18/2026  1.4         Called in the polling process only
+        *
+        * Parameters:
+        *   none
+        """
+        with self.lock:
+            if self.pid == os.getpid():
+                return
+            self.pid = os.getpid()
+            self.wakeup = threading.Event()
+            self.recover()
+            self.threads = [threading.Thread(target = self.run, name = 'TrainingJobWorker', daemon = True)
+                            for _ in range(self.workers)]
+            for thread in self.threads:
+                thread.start()
+            self.logger.info('Started %d Training job workers in process %d' % (self.workers, self.pid))
+
+
+if __name__ == '__main__':
+    # Training process of one job, started by TrainingJobQueue.launch with the run id and data path.
+    # Its stages run alone, so their memory peaks can be reset.
+    Metrics.reset_peaks = True
+    TrainingJobQueue(sys.argv[1]).execute(sys.argv[1], sys.argv[2])
@@ -1,12 +1,71 @@
 from apps.core.logger import Logger
-import json
+import time
+from concurrent.futures import ProcessPoolExecutor
 from sklearn.model_selection import train_test_split
+from apps.core.config import Config
 from apps.core.file_operation import FileOperation
+from apps.core.metrics import Metrics
+from apps.prediction.compiled_model import CompiledModel
 from apps.tuning.model_tuner import ModelTuner
 from apps.ingestion.load_validate import LoadValidate
 from apps.preprocess.preprocessor import Preprocessor
 from apps.tuning.cluster import KMeansCluster
 
+def train_cluster(run_id, data_path, cluster_number, cluster_data, n_jobs):
+    """
+    * Method: train_cluster
+    * Description: method to find the best model of one cluster, run in the process of a cluster worker.
+    *               With Config.compiled_inference the best model is compiled for the tree engine and kept
+    *               only if it predicts every row of the cluster like the model. A model that cannot be
+    *               compiled or verified is served by its library.
+    :return: Tuple of cluster number, best model name, best model and compiled model or None
+    *
+    * who       when        version     change (include bug = if apply)
+    * -----     -------     -------     -------------------------------
+    * Ray       10/18/2026  1.3         Initial Creation
+    * Ray       10/18/2026  1.6         Record the cluster stage metrics
+    * Ray       10/18/2026  1.7         Compile the best model
+    * Ray       10/18/2026  1.9         bug = any compile or verify error leaves the model uncompiled
+    *
+    * Parameters:
+    *   run_id
+    *   data_path
+    *   cluster_number
+    *   cluster_data: rows of the cluster with 'Labels' and 'Cluster' columns
+    *   n_jobs: share of the CPU budget for the grid searches of this cluster
+    """
+    start = time.perf_counter()
+    modelTuner = ModelTuner(run_id, data_path, 'training')
+    modelTuner.n_jobs = n_jobs
+
+    # Prepare the feature and label columns
+    cluster_features = cluster_data.drop(['Labels', 'Cluster'], axis = 1)
+    cluster_label = cluster_data['Labels']
+
+    with Metrics(run_id, 'training').stage('cluster %s' % cluster_number, rows = len(cluster_data)):
+        # Splitting the data into training and test set for each cluster one by one
+        x_train, x_test, y_train, y_test = train_test_split(cluster_features, cluster_label, test_size = 0.2, random_state = 0)
+        # Getting the best model for each of the clusters
+        best_model_name, best_model = modelTuner.get_best_model(x_train, y_train, x_test, y_test)
+    modelTuner.logger.info('Cluster %s: %d rows trained in %.2fs with %d jobs'
+                           % (cluster_number, len(cluster_data), time.perf_counter() - start, n_jobs))
+    compiled_model = None
+    if Config().compiled_inference:
+        try:
+            compiled_model = CompiledModel(best_model)
+            mismatches = compiled_model.verify(best_model, cluster_features)
+            if mismatches:
+                modelTuner.logger.warning('Cluster %s: compiled %s predicts %d rows differently, not used'
+                                          % (cluster_number, best_model_name, mismatches))
+                compiled_model = None
+        except ValueError as e:
+            modelTuner.logger.info('Cluster %s: %s is not compiled: %s' % (cluster_number, best_model_name, e))
+        except Exception as e:
+            # The model is served without its compiled engine, compiling must not fail the training
+            modelTuner.logger.exception('Cluster %s: compiling %s failed, not used: %s' % (cluster_number, best_model_name, e))
+            compiled_model = None
+    return cluster_number, best_model_name, best_model, compiled_model
+
 class TrainModel:
     """
     *
@@ -20,19 +79,83 @@ class TrainModel:
     * who       when        version     change (include bug = if apply)
     * -----     -------     -------     -------------------------------
     * Ray       03/29/2023  1.0         Initial Creation
+    * Ray       10/18/2026  1.1         Write the cluster to model manifest
+    * Ray       10/18/2026  1.2         Pass labels to the elbow search for stratified sampling
+    * Ray       10/18/2026  1.3         Concurrent per-cluster training under a CPU budget
+    * Ray       10/18/2026  1.4         Save the preprocessing pipeline instead of columns.json
+    * Ray       10/18/2026  1.5         Report stage and progress to the background job queue
+    * Ray       10/18/2026  1.6         Per-stage timing and resource metrics
+    * Ray       10/18/2026  1.7         Save the compiled cluster models
+    * Ray       10/18/2026  1.8         Cluster router in the manifest
+    * Ray       10/18/2026  1.9         bug = training does not fail when a model cannot be compiled
+    * Ray       10/18/2026  1.10        Remove the unused ModelTuner, cluster workers tune the models
+    * Ray       10/18/2026  1.11        bug = a failed training removes the models it saved
     *
     *
     * Description: Class to train the models
     """
-    def __init__(self, run_id, data_path):
+    def __init__(self, run_id, data_path, progress = None):
         self.run_id = run_id
         self.data_path = data_path
+        self.progress = progress # Optional callable(stage, fraction) reporting the training progress
         self.logger = Logger(self.run_id, 'TrainModel', 'training')
         self.loadValidate = LoadValidate(self.run_id, self.data_path, 'training')
         self.preProcess = Preprocessor(self.run_id, self.data_path, 'training')
-        self.modelTuner = ModelTuner(self.run_id, self.data_path, 'training')
         self.fileOperation = FileOperation(self.run_id, self.data_path, 'training')
         self.cluster = KMeansCluster(self.run_id, self.data_path)
+        self.config = Config()
+        self.metrics = Metrics(self.run_id, 'training')
+
+    def report_progress(self, stage, fraction):
+        """
+        * Method: report_progress
+        * Description: method to report the current stage and the completed fraction of the training
+        :return: none
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.5         Initial Creation
+        *
+        * Parameters:
+        *   stage: name of the training stage
+        *   fraction: completed fraction of the training, between 0 and 1
+        """
+        self.logger.info('Stage %s, %d%% done' % (stage, fraction * 100))
+        if self.progress is not None:
+            self.progress(stage, fraction)
+
+    def train_clusters(self, list_of_clusters):
+        """
+        * Method: train_clusters
+        * Description: method to train the clusters concurrently under Config.training_cpu_budget.
+        *               Up to Config.cluster_workers clusters run at once in separate processes and the budget
+        *               is split evenly between them for their grid searches. Clusters are submitted largest
+        *               first, so the wall-clock time is bounded by the biggest cluster.
+        :return: Generator of (cluster number, best model name, best model, compiled model), in submission order
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.3         Initial Creation
+        * Ray       10/18/2026  1.5         Yield each cluster as soon as it is trained
+        * Ray       10/18/2026  1.7         Compiled model of each cluster
+        *
+        * Parameters:
+        *   list_of_clusters: cluster numbers ordered from the largest cluster to the smallest
+        """
+        budget = max(1, self.config.training_cpu_budget)
+        workers = max(1, min(self.config.cluster_workers, budget, len(list_of_clusters)))
+        n_jobs = max(1, budget // workers)
+        self.logger.info('Training %d clusters with %d concurrent workers and %d jobs each'
+                         % (len(list_of_clusters), workers, n_jobs))
+        if workers == 1:
+            for i in list_of_clusters:
+                yield train_cluster(self.run_id, self.data_path, i, self.X[self.X['Cluster'] == i], n_jobs)
+            return
+        with ProcessPoolExecutor(max_workers = workers) as executor:
+            futures = [executor.submit(train_cluster, self.run_id, self.data_path, i, self.X[self.X['Cluster'] == i], n_jobs)
+                       for i in list_of_clusters]
+            for future in futures:
+                yield future.result()
 
     def training_model(self):
         """
@@ -43,6 +166,11 @@ class TrainModel:
         * who       when        version     change (include bug = if apply)
         * -----     -------     -------     -------------------------------
         * Ray       03/29/2023  1.0         Initial Creation
+        * Ray       10/18/2026  1.5         Stage and progress reporting
+        * Ray       10/18/2026  1.6         Record the metrics of each stage
+        * Ray       10/18/2026  1.7         Save the compiled cluster models
+        * Ray       10/18/2026  1.8         Cluster router in the manifest
+        * Ray       10/18/2026  1.11        Remove the models of a failed run, the manifest still lists the previous ones
         *
         * Parameters:
         *   none
@@ -51,37 +179,47 @@ class TrainModel:
             self.logger.info("Start of Training")
             self.logger.info("Run_id: " + str(self.run_id))
             # Load, Validation and Transformation
-            self.loadValidate.validate_trainset()
+            self.report_progress('validation', 0.0)
+            with self.metrics.stage('validation'):
+                self.loadValidate.validate_trainset()
             # Preprocessing activities
-            self.X, self.y = self.preProcess.preprocess_trainset()
-            columns = {"data_columns": [col for col in self.X.columns]}
-            with open('apps/database/columns.json', 'w') as f:
-                f.write(json.dumps(columns))
+            self.report_progress('preprocessing', 0.2)
+            with self.metrics.stage('preprocessing') as stage:
+                self.X, self.y = self.preProcess.preprocess_trainset()
+                stage['rows'] = len(self.X)
+                # Saving the fitted preprocessing pipeline applied at prediction
+                self.fileOperation.save_model(self.preProcess.pipeline, 'Preprocessor')
             # Create clusters
-            number_of_clusters = self.cluster.elbow_plot(self.X)
-            # Divide the data into clusters
-            self.X = self.cluster.create_clusters(self.X, number_of_clusters)
+            self.report_progress('clustering', 0.3)
+            with self.metrics.stage('clustering', rows = len(self.X)):
+                number_of_clusters = self.cluster.elbow_plot(self.X, self.y)
+                # Divide the data into clusters
+                self.X = self.cluster.create_clusters(self.X, number_of_clusters)
             # Create a new column in the dataset consisting of the corresponding cluster assignments.
             self.X['Labels'] = self.y
-            # Getting the unique clusters from our data set
-            list_of_clusters = self.X['Cluster'].unique()
-            # Parsing all the clusters and look for the best ML algorithm to fit on individual cluster
-            for i in list_of_clusters:
-                cluster_data = self.X[self.X['Cluster'] == i] # Filter the data for one cluster
-
-                # Prepare the feature and label columns
-                cluster_features = cluster_data.drop(['Labels', 'Cluster'], axis = 1)
-                cluster_label = cluster_data['Labels']
-
-                # Splitting the data into training and test set for each cluster one by one
-                x_train, x_test, y_train, y_test = train_test_split(cluster_features, cluster_label, test_size = 0.2, random_state = 0)
-                # Getting the best model for each of the clusters
-                best_model_name, best_model = self.modelTuner.get_best_model(x_train, y_train, x_test, y_test)
-
-                # Saving the best model to the directory.
-                save_model = self.fileOperation.save_model(best_model, best_model_name + str(i))
+            # Getting the unique clusters from our data set, largest first
+            list_of_clusters = self.X['Cluster'].value_counts().index
+            cluster_models = {} # Cluster number to (algorithm, model file name, compiled file name) for the model manifest
+            # Look for the best ML algorithm to fit on individual cluster, training the clusters concurrently
+            self.report_progress('model training', 0.4)
+            with self.metrics.stage('model training', rows = len(self.X)):
+                for i, best_model_name, best_model, compiled_model in self.train_clusters(list_of_clusters):
+                    # Saving the best model to the directory.
+                    save_model = self.fileOperation.save_model(best_model, best_model_name + str(i))
+                    # Saving the verified compiled model next to it
+                    compiled_name = None
+                    if compiled_model is not None:
+                        compiled_name = best_model_name + str(i) + 'Compiled'
+                        self.fileOperation.save_model(compiled_model, compiled_name)
+                    cluster_models[int(i)] = (best_model_name, best_model_name + str(i), compiled_name)
+                    self.report_progress('model training', 0.4 + 0.55 * len(cluster_models) / len(list_of_clusters))
 
+            # Writing the manifest used by prediction to resolve the model of each cluster
+            self.report_progress('saving models', 0.95)
+            with self.metrics.stage('saving models'):
+                self.fileOperation.write_manifest(cluster_models, self.cluster.router_name)
             self.logger.info("End of Training...")
         except Exception:
             self.logger.exception("Unsuccessful End of Training")
+            self.fileOperation.discard_run_models()
             raise Exception
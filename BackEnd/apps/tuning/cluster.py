@@ -1,13 +1,43 @@
+import time
+import numpy as np
+from joblib import Parallel, delayed
+from threadpoolctl import threadpool_limits
+from apps.core.config import Config
 from apps.core.logger import Logger
 import matplotlib.pyplot as plt
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from kneed import KneeLocator
 from sklearn.model_selection import train_test_split
 from apps.core.file_operation import FileOperation
+from apps.prediction.cluster_router import ClusterRouter
 from apps.tuning.model_tuner import ModelTuner
 from apps.ingestion.load_validate import LoadValidate
 from apps.preprocess.preprocessor import Preprocessor
 
+def fit_wcss(data, number_of_clusters, mode):
+    """
+    * Method: fit_wcss
+    * Description: method to fit one elbow candidate, limited to one thread so parallel candidates do not oversubscribe
+    :return: Tuple of number of clusters, WCSS and fit seconds
+    *
+    * who       when        version     change (include bug = if apply)
+    * -----     -------     -------     -------------------------------
+    * Ray       10/18/2026  1.1         Initial Creation
+    *
+    * Parameters:
+    *   data
+    *   number_of_clusters
+    *   mode: 'minibatch' uses MiniBatchKMeans, any other mode uses KMeans
+    """
+    start = time.perf_counter()
+    with threadpool_limits(limits = 1):
+        if mode == 'minibatch':
+            kmeans = MiniBatchKMeans(n_clusters = number_of_clusters, init = 'k-means++', random_state = 0)
+        else:
+            kmeans = KMeans(n_clusters = number_of_clusters, init = 'k-means++', random_state = 0)
+        kmeans.fit(data)
+    return number_of_clusters, kmeans.inertia_, time.perf_counter() - start
+
 class KMeansCluster:
     """
    *
@@ -21,6 +51,9 @@ class KMeansCluster:
    * who       when        version     change (include bug = if apply)
    * -----     -------     -------     -------------------------------
    * Ray       03/29/2023  1.0         Initial Creation
+   * Ray       10/18/2026  1.1         Parallel and early-terminating elbow search
+   * Ray       10/18/2026  1.2         Save the nearest-centroid cluster router
+   * Ray       10/18/2026  1.3         bug = early-stop elbow rounds independent of the worker count
    *
    *
    * Description: Class to cluster the dataset
@@ -30,35 +63,93 @@ class KMeansCluster:
         self.data_path = data_path
         self.logger = Logger(self.run_id, 'KMeansCluster', 'training')
         self.fileOperation = FileOperation(self.run_id, self.data_path, 'training')
+        self.config = Config()
+        self.router_name = None # Model file name of the verified cluster router, None if not saved
 
-    def elbow_plot(self, data):
+    def elbow_sample(self, data, labels):
+        """
+        * Method: elbow_sample
+        * Description: method to take the sample the elbow search is fitted on, stratified on the labels when given
+        :return: Feature array
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.1         Initial Creation
+        *
+        * Parameters:
+        *   data
+        *   labels
+        """
+        array = np.asarray(data, dtype = np.float64)
+        if self.config.elbow_mode != 'sample' or len(array) <= self.config.elbow_sample_size:
+            return array
+        sample, _ = train_test_split(array, train_size = self.config.elbow_sample_size, random_state = 0,
+                                     stratify = None if labels is None else np.asarray(labels))
+        self.logger.info('Elbow search fitted on a sample of %d rows' % len(sample))
+        return sample
+
+    def elbow_plot(self, data, labels = None):
         """
         * Method: elbow_plot
         * Description: method to save the plot to decide the optimum number of clusters to the file.
+        *               Candidates k=1..10 are fitted concurrently on Config.elbow_workers processes. With
+        *               Config.elbow_early_stop they are fitted in rounds of at most 3 increasing k, and the search stops
+        *               once the knee is unchanged between two rounds and at least two k beyond it are fitted.
+        *               The knee is then located on the fitted range only, so it can differ from a full search.
         :return: A picture saved to directory
         *
         * who       when        version     change (include bug = if apply)
         * -----     -------     -------     -------------------------------
         * Ray       04/02/2023  1.0         Initial Creation
+        * Ray       10/18/2026  1.1         Parallel fits, sample/minibatch modes and early stop
+        * Ray       10/18/2026  1.3         bug = rounds of at most 3 candidates, early stop did nothing with 10 workers
         *
         * Parameters:
         *   data
+        *   labels: optional labels used to stratify the sample in 'sample' mode
         """
         wcss = [] # Initializing an empty list -- within cluster sum of errors
         try:
             self.logger.info("Start of Elbow Plotting...")
-            for i in range(1, 11):
-                kmeans = KMeans(n_clusters = i, init = 'k-means++', random_state = 0) # Initializing the KMeans object
-                kmeans.fit(data) # Fitting the data to the KMeans algorithm
-                wcss.append(kmeans.inertia_)
-
-            plt.plot(range(1, 11), wcss) # Creating the graph between WCSS and the number of clusters
+            start = time.perf_counter()
+            candidates = list(range(1, 11))
+            sample = self.elbow_sample(data, labels)
+            workers = max(1, min(self.config.elbow_workers, len(candidates)))
+            # Small rounds, so a wide pool does not fit every candidate before the knee can be checked
+            round_size = min(workers, 3) if self.config.elbow_early_stop else len(candidates)
+            workers = min(workers, round_size)
+            fit_seconds = []
+            knee = None
+            with Parallel(n_jobs = workers) as parallel:
+                for i in range(0, len(candidates), round_size):
+                    results = parallel(delayed(fit_wcss)(sample, k, self.config.elbow_mode)
+                                       for k in candidates[i:i + round_size])
+                    wcss.extend(inertia for _, inertia, _ in results)
+                    fit_seconds.extend(seconds for _, _, seconds in results)
+                    if not self.config.elbow_early_stop or len(wcss) < 3 or len(wcss) == len(candidates):
+                        continue
+                    previous_knee = knee
+                    knee = KneeLocator(candidates[:len(wcss)], wcss, curve = 'convex', direction = 'decreasing').knee
+                    if knee is not None and knee == previous_knee and len(wcss) >= knee + 2:
+                        self.logger.info('Knee is stable at %d, stopping the elbow search at k=%d' % (knee, len(wcss)))
+                        break
+            fitted = candidates[:len(wcss)]
+            search_seconds = time.perf_counter() - start
+
+            plt.plot(fitted, wcss) # Creating the graph between WCSS and the number of clusters
             plt.title("The Elbow Method")
             plt.xlabel('Number of Clusters')
             plt.ylabel('WCSS')
             plt.savefig('apps/models/kmeans_elbow.png') # Saving the elbow plot locally
             # Finding the value of the optimum cluster programmatically
-            self.kn = KneeLocator(range(1, 11), wcss, curve = 'convex', direction = 'decreasing')
+            self.kn = KneeLocator(fitted, wcss, curve = 'convex', direction = 'decreasing')
+            # Serial full search time is estimated from the measured fits, extrapolated for skipped candidates
+            serial_seconds = sum(fit_seconds) * len(candidates) / len(fitted)
+            self.logger.info('WCSS curve: ' + str({k: round(w, 2) for k, w in zip(fitted, wcss)}))
+            self.logger.info('Elbow search took %.2fs with %d workers in %s mode, %d of %d candidates fitted, '
+                             'estimated %.2fs saved against a serial search'
+                             % (search_seconds, workers, self.config.elbow_mode, len(fitted), len(candidates),
+                                serial_seconds - search_seconds))
             self.logger.info('The optimum number of clusters is: ' + str(self.kn.knee))
             self.logger.info("End of Elbow Plotting...")
             return self.kn.knee
@@ -70,12 +161,14 @@ class KMeansCluster:
     def create_clusters(self, data, number_of_clusters):
         """
         * Method: create_clusters
-        * Description: method to create clusters
+        * Description: method to create clusters. The centroids are saved as a cluster router for prediction
+        *               when it routes every training row like KMeans.predict.
         :return: A data frame with cluster column
         *
         * who       when        version     change (include bug = if apply)
         * -----     -------     -------     -------------------------------
         * Ray       04/02/2023  1.0         Initial Creation
+        * Ray       10/18/2026  1.2         Save the cluster router
         *
         * Parameters:
         *   data
@@ -89,6 +182,14 @@ class KMeansCluster:
             self.saveModel = self.fileOperation.save_model(self.kmeans, 'KMeans')
             # Saving the KMeans model to directory
             # Passing 'Model' as the functions need three parameters
+            router = ClusterRouter(self.kmeans)
+            mismatches = router.verify(self.kmeans, data)
+            if mismatches:
+                self.logger.warning('Cluster router routes %d rows differently from KMeans, not used' % mismatches)
+                self.router_name = None
+            else:
+                self.fileOperation.save_model(router, 'ClusterRouter')
+                self.router_name = 'ClusterRouter'
             self.data['Cluster'] = self.y_kmeans # Create a new column in dataset for storing the cluster information
             self.logger.info('Successfully created ' + str(self.kn.knee) + 'clusters.')
             self.logger.info('End of Create Clusters...')
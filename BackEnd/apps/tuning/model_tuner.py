@@ -1,9 +1,10 @@
-from sklearn.model_selection import GridSearchCV
+from sklearn.experimental import enable_halving_search_cv # noqa: F401, enables HalvingGridSearchCV
+from sklearn.model_selection import GridSearchCV, RandomizedSearchCV, HalvingGridSearchCV, ParameterGrid
 from sklearn.ensemble import RandomForestClassifier
 from xgboost import XGBClassifier
 from sklearn.metrics import roc_auc_score, accuracy_score
+from apps.core.config import Config
 from apps.core.logger import Logger
-from sklearn.metrics import r2_score
 
 class ModelTuner:
     """
@@ -18,6 +19,9 @@ class ModelTuner:
     * who       when        version     change (include bug = if apply)
     * -----     -------     -------     -------------------------------
     * Ray       03/29/2023  1.0         Initial Creation
+    * Ray       10/18/2026  1.1         Grid search parallelism set by the training scheduler
+    * Ray       10/18/2026  1.2         Pluggable search strategy with in-place refit
+    * Ray       10/18/2026  1.3         Remove the unused r2_score import and initial estimators
     *
     *
     * Description: Class to tune and select the best model
@@ -27,8 +31,53 @@ class ModelTuner:
         self.run_id = run_id
         self.data_path = data_path
         self.logger = Logger(self.run_id, 'ModelTuner', mode)
-        self.rfc = RandomForestClassifier()
-        self.xgb = XGBClassifier(objective = 'binary: logistic')
+        self.config = Config()
+        # Search processes; each candidate model uses one thread so the CPU budget is not oversubscribed.
+        # The training scheduler lowers it to the share of the budget of each cluster
+        self.n_jobs = self.config.training_cpu_budget
+
+    def search(self, estimator, param_grid, train_x, train_y):
+        """
+        * Method: search
+        * Description: method to search the hyperparameters with the strategy in Config.search_strategy.
+        *               The search runs on self.n_jobs processes and refits the best candidate in place,
+        *               and the fit and score time of every candidate is logged.
+        :return: Fitted search object
+        *
+        * who       when        version     change (include bug = if apply)
+        * -----     -------     -------     -------------------------------
+        * Ray       10/18/2026  1.2         Initial Creation
+        *
+        * Parameters:
+        *   estimator
+        *   param_grid
+        *   train_x
+        *   train_y
+        """
+        strategy = self.config.search_strategy
+        if strategy == 'grid':
+            search = GridSearchCV(estimator, param_grid, cv = 5, n_jobs = self.n_jobs, refit = True)
+        elif strategy == 'random':
+            n_iter = min(self.config.search_iterations, len(ParameterGrid(param_grid)))
+            search = RandomizedSearchCV(estimator, param_grid, n_iter = n_iter, cv = 5, n_jobs = self.n_jobs,
+                                        refit = True, random_state = 0)
+        elif strategy == 'halving':
+            search = HalvingGridSearchCV(estimator, param_grid, cv = 5, n_jobs = self.n_jobs, refit = True,
+                                         min_resources = self.config.search_min_resources, random_state = 0)
+        else:
+            raise ValueError('Unknown search strategy: ' + str(strategy))
+        search.fit(train_x, train_y)
+
+        # Logging the cost of each candidate
+        results = search.cv_results_
+        for i, params in enumerate(results['params']):
+            resources = ', rows: %d' % results['n_resources'][i] if 'n_resources' in results else ''
+            self.logger.info('%s candidate %s: fit %.3fs, score %.3fs, mean score %.4f%s'
+                             % (strategy, params, results['mean_fit_time'][i], results['mean_score_time'][i],
+                                results['mean_test_score'][i], resources))
+        self.logger.info('%s search evaluated %d candidates, total fit time %.2fs'
+                         % (strategy, len(results['params']), sum(results['mean_fit_time']) * search.n_splits_))
+        return search
 
     def best_params_randomforest(self, train_x, train_y):
         """
@@ -39,6 +88,7 @@ class ModelTuner:
         * who       when        version     change (include bug = if apply)
         * -----     -------     -------     -------------------------------
         * Ray       03/29/2023  1.0         Initial Creation
+        * Ray       10/18/2026  1.2         Search strategy from Config, best model refitted in place
         *
         * Parameters:
         *   train_x
@@ -49,25 +99,9 @@ class ModelTuner:
             # Initializing with different combination of parameters
             self.param_grid = {"n_estimators": [10, 50, 100, 130], "criterion": ['gini', 'entropy'],
                                "max_depth": range(2, 4, 1), "max_features": ['sqrt', 'log2']}
-            # Creating an object of the Grid Search Class
-            self.grid = GridSearchCV(estimator = self.rfc, param_grid = self.param_grid, cv = 5)
-            # Finding the best parameters
-            self.grid.fit(train_x, train_y)
-
-            # Extracting the best parameters
-            self.criterion = self.grid.best_params_['criterion']
-            self.max_depth = self.grid.best_params_['max_depth']
-            self.max_features = self.grid.best_params_['max_features']
-            self.n_estimators = self.grid.best_params_['n_estimators']
-
-            # Creating a new model with the best parameters
-            self.rfc = RandomForestClassifier(n_estimators = self.n_estimators,
-                                              criterion = self.criterion,
-                                              max_depth = self.max_depth,
-                                              max_features = self.max_features)
-
-            # Training the new model
-            self.rfc.fit(train_x, train_y)
+            # Searching the best parameters, the best model is refitted on the whole training set
+            self.grid = self.search(RandomForestClassifier(), self.param_grid, train_x, train_y)
+            self.rfc = self.grid.best_estimator_
             self.logger.info("Random Forest best params: " + str(self.grid.best_params_))
             self.logger.info("End of finding the best params for randomforest classifier...")
 
@@ -85,6 +119,7 @@ class ModelTuner:
         * who       when        version     change (include bug = if apply)
         * -----     -------     -------     -------------------------------
         * Ray       03/29/2023  1.0         Initial Creation
+        * Ray       10/18/2026  1.2         Search strategy from Config, best model refitted in place
         *
         * Parameters:
         *   train_x
@@ -99,23 +134,9 @@ class ModelTuner:
                 'n_estimators': [10, 50, 100, 200]
             }
 
-            # Creating an object of the Grid Search Class
-            self.grid = GridSearchCV(XGBClassifier(objective = 'binary:logistic'), self.param_grid_xgboost, cv = 5)
-            # Finding the best paramters
-            self.grid.fit(train_x, train_y)
-
-            # Extracting the best parameters
-            self.learning_rate = self.grid.best_params_['learning_rate']
-            self.max_depth = self.grid.best_params_['max_depth']
-            self.n_estimators = self.grid.best_params_['n_estimators']
-
-            # Creating a new model with the best parameters
-            self.xgb = XGBClassifier(objective = 'binary:logistic',
-                                     learning_rate = self.learning_rate,
-                                     max_depth = self.max_depth,
-                                     n_estimators = self.n_estimators)
-            # Training the new model
-            self.xgb.git(train_x, train_y)
+            # Searching the best parameters, the best model is refitted on the whole training set
+            self.grid = self.search(XGBClassifier(objective = 'binary:logistic', n_jobs = 1), self.param_grid_xgboost, train_x, train_y)
+            self.xgb = self.grid.best_estimator_
             self.logger.info('XGBoost best params: ' + str(self.grid.best_params_))
             self.logger.info('End of finding the best params for XGBoost algorithm...')
             return self.xgb
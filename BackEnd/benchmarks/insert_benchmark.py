@@ -0,0 +1,114 @@
+"""
+*
+* filename: insert_benchmark.py
+* version: 1.0
+* author: Ray Joshi
+* Creation date: 10/18/2026
+*
+* Change History:
+*
+* who       when        version     change (include bug = if apply)
+* -----     -------     -------     -------------------------------
+* Ray       10/18/2026  1.0         Initial Creation
+*
+*
+* Description: Benchmark of DatabaseOperation.insert_data (one commit per row) against
+*               DatabaseOperation.bulk_insert_data (batched, chunked transactions).
+*               The 15k-row training file is scaled up to the requested number of rows.
+*               Run from the BackEnd directory: python -m benchmarks.insert_benchmark --rows 1000000
+"""
+import argparse
+import csv
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from apps.core.config import Config
+from apps.database.database_operation import DatabaseOperation
+
+SOURCE_FILE = 'data/training_data/hr_employee_churn_data.csv'
+
+
+def scale_dataset(target_path, rows):
+    """
+    * Method: scale_dataset
+    * Description: method to write the training file repeated up to the given number of rows, with fresh empids
+    :return: none
+    *
+    * Parameters:
+    *   target_path
+    *   rows
+    """
+    with open(SOURCE_FILE, 'r', newline = '') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        source_rows = list(reader)
+    with open(target_path, 'w', newline = '') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        written = 0
+        while written < rows:
+            for row in source_rows[:rows - written]:
+                written += 1
+                writer.writerow([written] + row[1:])
+
+
+def run_insert(method, rows, database_name, work_dir, **kwargs):
+    """
+    * Method: run_insert
+    * Description: method to time one insert path on a fresh database
+    :return: Dictionary with rows, seconds and rows per second
+    *
+    * Parameters:
+    *   method: 'insert_data' or 'bulk_insert_data'
+    *   rows
+    *   database_name
+    *   work_dir
+    """
+    data_path = os.path.join(work_dir, database_name)
+    os.makedirs(data_path)
+    os.makedirs(data_path + '_rejects')
+    scale_dataset(os.path.join(data_path, 'input.csv'), rows)
+    for suffix in ['', '-wal', '-shm']:
+        if os.path.exists('apps/database/' + database_name + '.db' + suffix):
+            os.remove('apps/database/' + database_name + '.db' + suffix)
+    with open('apps/database/schema_train.json', 'r') as f:
+        column_names = json.load(f)['ColName']
+    db_operation = DatabaseOperation(Config().get_run_id(), data_path, 'training')
+    db_operation.create_table(database_name, 'training_raw_data_t', column_names)
+    start = time.perf_counter()
+    getattr(db_operation, method)(database_name, 'training_raw_data_t', **kwargs)
+    seconds = time.perf_counter() - start
+    for suffix in ['', '-wal', '-shm']:
+        if os.path.exists('apps/database/' + database_name + '.db' + suffix):
+            os.remove('apps/database/' + database_name + '.db' + suffix)
+    return {'method': method, 'rows': rows, 'seconds': round(seconds, 3), 'rows_per_second': round(rows / seconds, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'Per-row vs bulk SQLite insert benchmark')
+    parser.add_argument('--rows', type = int, default = 1000000, help = 'rows for the bulk insert path')
+    parser.add_argument('--rowwise-rows', type = int, default = 20000,
+                        help = 'rows for the per-row path, which commits once per row and is timed on a smaller sample')
+    parser.add_argument('--chunk-size', type = int, default = Config().insert_chunk_size)
+    parser.add_argument('--journal-mode', default = Config().journal_mode)
+    args = parser.parse_args()
+
+    os.makedirs('logs/training_logs', exist_ok = True)
+    work_dir = tempfile.mkdtemp(prefix = 'insert_benchmark_')
+    try:
+        results = [
+            run_insert('insert_data', args.rowwise_rows, 'benchmark_rowwise', work_dir),
+            run_insert('bulk_insert_data', args.rows, 'benchmark_bulk', work_dir,
+                       chunk_size = args.chunk_size, journal_mode = args.journal_mode),
+        ]
+    finally:
+        shutil.rmtree(work_dir)
+    results.append({'speedup': round(results[1]['rows_per_second'] / results[0]['rows_per_second'], 1)})
+    print(json.dumps(results, indent = 2))
+
+
+if __name__ == '__main__':
+    main()
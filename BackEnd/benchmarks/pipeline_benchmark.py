@@ -0,0 +1,388 @@
+"""
+*
+* filename: pipeline_benchmark.py
+* version: 1.0
+* author: Ray Joshi
+* Creation date: 10/18/2026
+*
+* Change History:
+*
+* who       when        version     change (include bug = if apply)
+* -----     -------     -------     -------------------------------
+* Ray       10/18/2026  1.0         Initial Creation
+* Ray       10/18/2026  1.1         bug = reset the stage memory peaks in the scale process only
+*
+*
+* Description: End to end benchmark of the training and prediction pipelines on synthetic data.
+*               Data matching schema_train.json and schema_predict.json is generated at each requested
+*               scale, with a configurable null rate and category skew. Numeric ranges and binary rates
+*               are profiled from the shipped training file. Every scale runs in a fresh process in an
+*               isolated work directory, so production models and databases are untouched and peak memory
+*               is per scale. The stage records written by Metrics are collected into one JSON result, and
+*               a previous result can be given as a baseline to fail on throughput regressions.
+*               Run from the BackEnd directory:
+*               python -m benchmarks.pipeline_benchmark --rows 100000 1000000 --set search_strategy=random
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from apps.core.config import Config
+from apps.core.logger import Logger
+from apps.core.metrics import Metrics, process_peak_rss_mb
+from apps.prediction.predict_model import PredictionModel
+from apps.training.train_model import TrainModel
+
+SOURCE_FILE = 'data/training_data/hr_employee_churn_data.csv'
+SCHEMA_FILES = ['schema_train.json', 'schema_predict.json']
+WORK_DIRECTORIES = ['apps/database', 'apps/models', 'logs/training_logs', 'logs/prediction_logs',
+                    'data/training_data', 'data/prediction_data']
+GENERATION_CHUNK_SIZE = 100000
+# Slowdowns below this many seconds are noise, whatever the tolerance
+NOISE_FLOOR_SECONDS = 0.5
+
+
+def profile_columns(schema, source_file):
+    """
+    * Method: profile_columns
+    * Description: method to get the value range of each numeric schema column from the source file.
+    *               Columns missing from the file are profiled as 0 to 1 floats or 0 to 10 integers.
+    :return: Dictionary of column name to (low, high, is integer, is binary)
+    *
+    * Parameters:
+    *   schema: schema dictionary
+    *   source_file
+    """
+    source = pd.read_csv(source_file) if os.path.exists(source_file) else pd.DataFrame()
+    profile = {}
+    for column, column_type in schema['ColName'].items():
+        if column_type == 'VARCHAR':
+            continue
+        is_integer = column_type == 'INTEGER'
+        if column in source and source[column].notna().any():
+            values = source[column].dropna()
+            low, high = float(values.min()), float(values.max())
+            binary = is_integer and set(values.unique()) <= {0, 1}
+            profile[column] = (low, float(values.mean()) if binary else high, is_integer, binary)
+        else:
+            profile[column] = (0.0, 10.0 if is_integer else 1.0, is_integer, False)
+    return profile
+
+
+def generate_dataset(path, schema, profile, rows, null_rate, category_skew, seed, label = None):
+    """
+    * Method: generate_dataset
+    * Description: method to write a synthetic CSV file of the schema columns in chunks, so the scale is not
+    *               bound by memory. empid counts from 1 and the label is drawn from a fixed logistic model of
+    *               the features, so the models have something to learn. Feature cells are left empty with
+    *               probability null_rate, and categories follow Zipf weights 1 / rank ** category_skew.
+    :return: none
+    *
+    * Parameters:
+    *   path: CSV file path
+    *   schema: schema dictionary
+    *   profile: column profile from profile_columns
+    *   rows
+    *   null_rate: probability of an empty feature cell
+    *   category_skew: 0 for uniform categories
+    *   seed
+    *   label: label column name, None for a prediction file
+    """
+    rng = np.random.default_rng(seed)
+    # The same label model is used at every scale and in every chunk
+    weights = np.random.default_rng(0).normal(size = len(schema['ColName']))
+    categories = schema.get('Categories', {})
+    written = 0
+    with open(path, 'w', newline = '') as f:
+        while written < rows:
+            size = min(GENERATION_CHUNK_SIZE, rows - written)
+            chunk = {}
+            score = np.zeros(size)
+            for i, (column, column_type) in enumerate(schema['ColName'].items()):
+                if column == 'empid':
+                    chunk[column] = np.arange(written + 1, written + size + 1)
+                    continue
+                if column == label:
+                    continue
+                if column_type == 'VARCHAR':
+                    vocabulary = categories.get(column, ['a', 'b', 'c'])
+                    p = 1.0 / np.arange(1, len(vocabulary) + 1) ** category_skew
+                    codes = rng.choice(len(vocabulary), size = size, p = p / p.sum())
+                    values = np.asarray(vocabulary, dtype = object)[codes]
+                    score += weights[i] * (codes - codes.mean()) / max(len(vocabulary) - 1, 1)
+                else:
+                    low, high, is_integer, binary = profile[column]
+                    if binary:
+                        values = (rng.random(size) < high).astype(np.float64)
+                        score += weights[i] * values
+                    else:
+                        values = rng.uniform(low, high + (1 if is_integer else 0), size)
+                        values = np.floor(values) if is_integer else np.round(values, 2)
+                        score += weights[i] * (values - low) / max(high - low, 1e-9)
+                    values = values.astype(object)
+                    if is_integer:
+                        values = values.astype(np.int64).astype(object)
+                values[rng.random(size) < null_rate] = None
+                chunk[column] = values
+            if label is not None:
+                chunk[label] = (rng.random(size) < 1.0 / (1.0 + np.exp(-(score - score.mean())))).astype(np.int64)
+            pd.DataFrame(chunk, columns = list(schema['ColName'])).to_csv(f, header = written == 0, index = False)
+            written += size
+
+
+def prepare_workspace(work_dir):
+    """
+    * Method: prepare_workspace
+    * Description: method to create the directory layout the pipeline expects, with the schema files
+    :return: none
+    *
+    * Parameters:
+    *   work_dir
+    """
+    for directory in WORK_DIRECTORIES:
+        os.makedirs(os.path.join(work_dir, directory), exist_ok = True)
+    for schema_file in SCHEMA_FILES:
+        shutil.copy(os.path.join('apps/database', schema_file), os.path.join(work_dir, 'apps/database', schema_file))
+
+
+def apply_overrides(overrides):
+    """
+    * Method: apply_overrides
+    * Description: method to override Config attributes in this process, e.g. a random search for large scales
+    :return: none
+    *
+    * Parameters:
+    *   overrides: dictionary of attribute name to value
+    """
+    if not overrides:
+        return
+    original = Config.__init__
+
+    def __init__(self):
+        original(self)
+        for name, value in overrides.items():
+            setattr(self, name, value)
+    Config.__init__ = __init__
+
+
+def time_single_predictions(prediction, path, count):
+    """
+    * Method: time_single_predictions
+    * Description: method to time the scoring of single records, as served by /predict
+    :return: Dictionary of latency percentiles in milliseconds
+    *
+    * Parameters:
+    *   prediction: PredictionModel with the trained models
+    *   path: prediction CSV file to take the records from
+    *   count: number of records
+    """
+    records = pd.read_csv(path, nrows = count).astype(object)
+    records = records.where(records.notna(), None).to_dict('records')
+    prediction.predict_records(records[:1]) # Loads the models
+    latencies = []
+    for record in records:
+        start = time.perf_counter()
+        prediction.predict_records([record])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {'records': len(latencies), 'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+            'p99_ms': round(float(np.percentile(latencies, 99)), 3)}
+
+
+def run_scale(args, rows, work_dir, results):
+    """
+    * Method: run_scale
+    * Description: method to generate the data of one scale, then train, batch predict and score single
+    *               records in the work directory, putting the scale result on the results queue
+    :return: none
+    *
+    * Parameters:
+    *   args: parsed arguments
+    *   rows: training rows
+    *   work_dir
+    *   results: multiprocessing queue
+    """
+    try:
+        apply_overrides(args.overrides)
+        # The stages of a scale run alone in this process, so their memory peaks can be reset
+        Metrics.reset_peaks = True
+        profile_source = os.path.abspath(SOURCE_FILE)
+        prepare_workspace(work_dir)
+        os.chdir(work_dir)
+        with open('apps/database/schema_train.json', 'r') as f:
+            train_schema = json.load(f)
+        with open('apps/database/schema_predict.json', 'r') as f:
+            predict_schema = json.load(f)
+        profile = profile_columns(train_schema, profile_source)
+        predict_rows = args.predict_rows or rows
+        stages = []
+
+        start = time.perf_counter()
+        generate_dataset('data/training_data/synthetic_train.csv', train_schema, profile, rows,
+                         args.null_rate, args.category_skew, args.seed, label = 'left')
+        generate_dataset('data/prediction_data/synthetic_predict.csv', predict_schema, profile, predict_rows,
+                         args.null_rate, args.category_skew, args.seed + 1)
+        stages.append({'mode': 'generation', 'stage': 'synthetic data', 'rows': rows + predict_rows,
+                       'wall_seconds': round(time.perf_counter() - start, 4)})
+        shutil.copy('data/prediction_data/synthetic_predict.csv', 'single_records.csv')
+
+        config = Config()
+        run_id = config.get_run_id()
+        start = time.perf_counter()
+        TrainModel(run_id, config.training_data_path).training_model()
+        training_seconds = time.perf_counter() - start
+        stages += [dict(record, mode = 'training') for record in Metrics(run_id, 'training').read()]
+        Logger.close(run_id, 'training')
+
+        run_id = config.get_run_id()
+        prediction = PredictionModel(run_id, config.prediction_data_path)
+        start = time.perf_counter()
+        prediction.batch_predict_from_model(args.chunk_size)
+        prediction_seconds = time.perf_counter() - start
+        stages += [dict(record, mode = 'prediction') for record in Metrics(run_id, 'prediction').read()]
+        single = time_single_predictions(prediction, 'single_records.csv', args.single_records) if args.single_records else None
+        Logger.close(run_id, 'prediction')
+
+        for stage in stages:
+            for name in ['run_id', 'pid', 'finished_at']:
+                stage.pop(name, None)
+            if stage['stage'] == 'validation':
+                stage['rows'] = rows if stage['mode'] == 'training' else predict_rows
+            if stage.get('rows') and stage.get('wall_seconds'):
+                stage['rows_per_second'] = round(stage['rows'] / stage['wall_seconds'], 1)
+        results.put({'rows': rows, 'predict_rows': predict_rows, 'null_rate': args.null_rate,
+                     'category_skew': args.category_skew, 'training_seconds': round(training_seconds, 3),
+                     'prediction_seconds': round(prediction_seconds, 3), 'single_predict': single,
+                     'process_peak_rss_mb': process_peak_rss_mb(), 'stages': stages})
+    except BaseException as e:
+        results.put({'rows': rows, 'error': repr(e)})
+        raise
+
+
+def wait_result(process, results, rows):
+    """
+    * Method: wait_result
+    * Description: method to wait for the result of a scale process. A process killed before putting its
+    *               result, by the OOM killer or a crash, gives an error result instead of a hang.
+    :return: Scale result
+    *
+    * Parameters:
+    *   process: multiprocessing Process running run_scale
+    *   results: multiprocessing queue
+    *   rows: training rows of the scale
+    """
+    while True:
+        try:
+            return results.get(timeout = 1)
+        except queue.Empty:
+            if not process.is_alive():
+                break
+    # The result may have been put just before the process exited
+    try:
+        return results.get(timeout = 1)
+    except queue.Empty:
+        return {'rows': rows, 'error': 'scale process exited with code %s' % process.exitcode}
+
+
+def compare(results, baseline, tolerance):
+    """
+    * Method: compare
+    * Description: method to find the stages slower than in the baseline result by more than the tolerance.
+    *               Stages are matched on scale, mode and stage name; stages of one side only are ignored.
+    :return: List of regression descriptions
+    *
+    * Parameters:
+    *   results: benchmark result
+    *   baseline: previous benchmark result
+    *   tolerance: allowed relative slowdown, 0.2 for 20%
+    """
+    previous = {(scale['rows'], stage['mode'], stage['stage']): stage['wall_seconds']
+                for scale in baseline['scales'] if 'stages' in scale for stage in scale['stages']}
+    regressions = []
+    for scale in results['scales']:
+        for stage in scale.get('stages', []):
+            before = previous.get((scale['rows'], stage['mode'], stage['stage']))
+            if before and stage['wall_seconds'] > max(before * (1 + tolerance), before + NOISE_FLOOR_SECONDS):
+                regressions.append('%s rows, %s %s: %.3fs vs %.3fs' % (scale['rows'], stage['mode'], stage['stage'],
+                                                                       stage['wall_seconds'], before))
+    return regressions
+
+
+def parse_override(text):
+    """
+    * Method: parse_override
+    * Description: method to parse a name=value Config override, the value as JSON when it parses
+    :return: Tuple of name and value
+    *
+    * Parameters:
+    *   text
+    """
+    name, _, value = text.partition('=')
+    try:
+        return name, json.loads(value)
+    except ValueError:
+        return name, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description = 'End to end training and prediction benchmark on synthetic data')
+    parser.add_argument('--rows', type = int, nargs = '+', default = [100000], help = 'training rows of each scale')
+    parser.add_argument('--predict-rows', type = int, default = None, help = 'prediction rows, defaults to the training rows')
+    parser.add_argument('--null-rate', type = float, default = 0.01, help = 'probability of an empty feature cell')
+    parser.add_argument('--category-skew', type = float, default = 1.0, help = 'Zipf exponent of the categories, 0 for uniform')
+    parser.add_argument('--seed', type = int, default = 42)
+    parser.add_argument('--chunk-size', type = int, default = None, help = 'batch prediction chunk size')
+    parser.add_argument('--single-records', type = int, default = 200, help = 'single records scored for latency, 0 to skip')
+    parser.add_argument('--set', dest = 'overrides', action = 'append', default = [], type = parse_override,
+                        metavar = 'NAME=VALUE', help = 'Config attribute override, e.g. search_strategy=random')
+    parser.add_argument('--output', default = None, help = 'JSON result file, printed when not given')
+    parser.add_argument('--baseline', default = None, help = 'previous JSON result to check for regressions')
+    parser.add_argument('--tolerance', type = float, default = 0.2, help = 'allowed relative slowdown of a stage')
+    parser.add_argument('--keep', action = 'store_true', help = 'keep the work directories')
+    args = parser.parse_args()
+    args.overrides = dict(args.overrides)
+
+    results = {'started_at': time.time(), 'cpu_count': os.cpu_count(), 'overrides': args.overrides, 'scales': []}
+    for rows in args.rows:
+        work_dir = tempfile.mkdtemp(prefix = 'pipeline_benchmark_%d_' % rows)
+        scale_results = multiprocessing.Queue()
+        # A fresh process per scale: peak memory is per scale and module state does not leak between scales
+        process = multiprocessing.Process(target = run_scale, args = (args, rows, work_dir, scale_results))
+        process.start()
+        result = wait_result(process, scale_results, rows)
+        process.join()
+        if args.keep:
+            result['work_dir'] = work_dir
+        else:
+            shutil.rmtree(work_dir, ignore_errors = True)
+        results['scales'].append(result)
+        print('%d rows: %s' % (rows, result.get('error') or '%.1fs training, %.1fs prediction'
+                                    % (result['training_seconds'], result['prediction_seconds'])), file = sys.stderr)
+
+    output = json.dumps(results, indent = 2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    failed = [scale for scale in results['scales'] if 'error' in scale]
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print('Regression: ' + regression, file = sys.stderr)
+        failed += regressions
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
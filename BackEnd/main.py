@@ -1,25 +1,43 @@
 from wsgiref import simple_server
-from flask import Flask, request, render_template
+import math
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from flask import Flask, request, render_template, jsonify, g
 from flask import Response
 import pandas as pd
 import os
 from flask_cors import CORS, cross_origin
 from apps.core.config import Config
+from apps.core.metrics import Metrics
+from apps.database.database_operation import DatabaseOperation
+from apps.prediction.micro_batcher import MicroBatcher
+from apps.training.job_queue import TrainingJobQueue
+from apps.serving.prefork_server import PreforkServer, ThreadingWSGIServer
 
 app = Flask(__name__)
 CORS(app)
 
+# Coalesces concurrent /predict requests into vectorized model calls
+predict_config = Config()
+predict_batcher = MicroBatcher(predict_config.get_run_id(), predict_config.prediction_data_path)
+# Runs training requests in the background, jobs are kept in a SQLite table across restarts
+training_jobs = TrainingJobQueue(predict_batcher.run_id)
+# Looks up the batch predictions stored in the prediction database
+prediction_store = DatabaseOperation(predict_batcher.run_id, predict_config.prediction_data_path, 'prediction')
+
 @app.route('/training', methods = ['POST'])
 @cross_origin()
 def training_route_client():
     """
     * Method: training_route_client
-    * Description: method to call training route
+    * Description: method to call training route. The training job is queued and runs in the background,
+    *               its progress is reported by GET /training/<run_id>
     :return: none
     *
     * who       when        version     change (include bug = if apply)
     * -----     -------     -------     -------------------------------
     * Ray       03/29/2023  1.0         Initial Creation
+    * Ray       10/18/2026  1.1         Queue a background training job
     *
     * Parameters:
     *   none
@@ -29,8 +47,9 @@ def training_route_client():
         # Get Run ID
         run_id = config.get_run_id()
         data_path = config.training_data_path
-        # trainmodel object initialization
-        return Response("Training successful! and it's RunID is: " + str(run_id))
+        # Queue the training job
+        training_jobs.enqueue(run_id, data_path)
+        return Response("Training queued! and it's RunID is: " + str(run_id), status = 202)
     except ValueError:
         return Response("Error Occurred! %s" % ValueError)
     except KeyError:
@@ -38,8 +57,168 @@ def training_route_client():
     except Exception as e:
         return Response("Error Occurred! %s" % e)
 
+@app.route('/training/<run_id>', methods = ['GET'])
+@cross_origin()
+def training_status_route_client(run_id):
+    """
+    * Method: training_status_route_client
+    * Description: method to report the status, stage, progress and stage timings of a training job
+    :return: JSON of the training job
+    *
+    * who       when        version     change (include bug = if apply)
+    * -----     -------     -------     -------------------------------
+    * Ray       10/18/2026  1.1         Initial Creation
+    *
+    * Parameters:
+    *   run_id: run id returned by POST /training
+    """
+    try:
+        job = training_jobs.status(run_id)
+        if job is None:
+            return Response("Unknown training RunID: %s" % run_id, status = 404)
+        return jsonify(job)
+    except Exception as e:
+        return Response("Error Occurred! %s" % e, status = 500)
+
+@app.route('/predict', methods = ['POST'])
+@cross_origin()
+def predict_route_client():
+    """
+    * Method: predict_route_client
+    * Description: method to call predict route. The body is one employee record, or a list of records,
+    *               with the prediction schema columns. The request waits Config.batch_window plus
+    *               Config.batch_score_timeout for each batch its records need, and answers 503 after that.
+    :return: JSON with empid and prediction, or a list of them
+    *
+    * who       when        version     change (include bug = if apply)
+    * -----     -------     -------     -------------------------------
+    * Ray       10/18/2026  1.1         Initial Creation
+    * Ray       10/18/2026  1.2         bug = 503 instead of waiting forever for a stalled batcher
+    *
+    * Parameters:
+    *   none
+    """
+    try:
+        data = request.get_json(force = True)
+        records = data if isinstance(data, list) else [data]
+        futures = [predict_batcher.submit(record) for record in records]
+        batches = math.ceil(len(records) / predict_config.batch_max_size)
+        deadline = time.monotonic() + batches * (predict_config.batch_window + predict_config.batch_score_timeout)
+        results = [{"empid": record.get('empid'), "prediction": future.result(max(0, deadline - time.monotonic()))}
+                   for record, future in zip(records, futures)]
+        return jsonify(results if isinstance(data, list) else results[0])
+    except FutureTimeoutError:
+        return Response("Error Occurred! Prediction timed out", status = 503)
+    except ValueError:
+        return Response("Error Occurred! %s" % ValueError, status = 400)
+    except KeyError:
+        return Response("Error Occurred! %s" % KeyError, status = 400)
+    except Exception as e:
+        return Response("Error Occurred! %s" % e, status = 500)
+
+@app.route('/predictions/<int:empid>', methods = ['GET'])
+@cross_origin()
+def prediction_lookup_route_client(empid):
+    """
+    * Method: prediction_lookup_route_client
+    * Description: method to look up the latest stored batch prediction of an employee, without scoring.
+    *               The model_version query parameter selects the prediction of one model version.
+    :return: JSON with empid, model version, prediction, run id and prediction time
+    *
+    * who       when        version     change (include bug = if apply)
+    * -----     -------     -------     -------------------------------
+    * Ray       10/18/2026  1.1         Initial Creation
+    *
+    * Parameters:
+    *   empid
+    """
+    try:
+        result = prediction_store.latest_prediction(predict_config.prediction_database, empid, request.args.get('model_version'))
+        if result is None:
+            return Response("No prediction for empid: %s" % empid, status = 404)
+        return jsonify(result)
+    except Exception as e:
+        return Response("Error Occurred! %s" % e, status = 500)
+
+@app.route('/metrics', methods = ['GET'])
+def metrics_route_client():
+    """
+    * Method: metrics_route_client
+    * Description: method to expose the serving latency histograms in the Prometheus text format
+    :return: Metrics text
+    *
+    * who       when        version     change (include bug = if apply)
+    * -----     -------     -------     -------------------------------
+    * Ray       10/18/2026  1.1         Initial Creation
+    *
+    * Parameters:
+    *   none
+    """
+    return Response(Metrics.exposition(), mimetype = 'text/plain; version=0.0.4')
+
+@app.before_request
+def start_timer():
+    """
+    * Method: start_timer
+    * Description: method to record the start of the request for its latency histogram
+    :return: none
+    *
+    * who       when        version     change (include bug = if apply)
+    * -----     -------     -------     -------------------------------
+    * Ray       10/18/2026  1.1         Initial Creation
+    *
+    * Parameters:
+    *   none
+    """
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def observe_latency(response):
+    """
+    * Method: observe_latency
+    * Description: method to add the request latency to the histogram of its route
+    :return: response
+    *
+    * who       when        version     change (include bug = if apply)
+    * -----     -------     -------     -------------------------------
+    * Ray       10/18/2026  1.1         Initial Creation
+    *
+    * Parameters:
+    *   response
+    """
+    if request.endpoint in Metrics.histograms:
+        Metrics.observe(request.endpoint, time.perf_counter() - g.request_start)
+    return response
+
+# Histograms are created before the server forks so every worker adds to the same counters
+for endpoint in [rule.endpoint for rule in app.url_map.iter_rules() if rule.endpoint not in ('static', 'metrics_route_client')] + ['predict_batch']:
+    Metrics.histogram(endpoint)
+
+def start_training_jobs(slot):
+    """
+    * Method: start_training_jobs
+    * Description: method called in each prefork worker to start the training job workers in the worker of
+    *               slot 0 only, so one process polls the job table
+    :return: none
+    *
+    * who       when        version     change (include bug = if apply)
+    * -----     -------     -------     -------------------------------
+    * Ray       10/18/2026  1.1         Initial Creation
+    *
+    * Parameters:
+    *   slot: slot of the prefork worker
+    """
+    if slot == 0:
+        training_jobs.start()
+
 if __name__ == "__main__":
     host = '0.0.0.0'
     port = 5000
-    httpd = simple_server.make_server(host, port, app)
-    httpd.serve_forever()
+    httpd = simple_server.make_server(host, port, app, server_class = ThreadingWSGIServer)
+    # Fork worker processes sharing the loaded models where the platform supports it
+    if predict_config.server_workers > 1 and hasattr(os, 'fork'):
+        PreforkServer(httpd, predict_batcher.run_id, predict_config.server_workers,
+                      post_fork = start_training_jobs).serve_forever()
+    else:
+        training_jobs.start()
+        httpd.serve_forever()